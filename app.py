@@ -0,0 +1,61 @@
+import logging
+import os
+import time
+
+import streamlit as st
+
+from fair_scheduler import get_scheduler
+from llm_integration import get_llm_backend
+from perf_tracing import trace_span
+from shared_data import enable_copy_on_write, get_shared_data_layer
+from tenants import load_tenants
+
+# App factory shared by every page. Streamlit re-executes a page script on each widget interaction,
+# so page modules only define functions and call run_page under __main__: process-wide setup
+# (tenants, scheduler, shared data layer, LLM backend) happens once in bootstrap. What every rerun pays
+# before drawing anything (page config, the bootstrap lookup and the page's own `prepare` step, such as
+# resolving the tenant and looking up its shared report) is measured against the overhead budget;
+# rendering is traced separately.
+logger = logging.getLogger("bizbuddy.app")
+
+# Time a rerun may spend before the page starts rendering
+RERUN_OVERHEAD_BUDGET_SECONDS = float(os.environ.get("BIZBUDDY_RERUN_OVERHEAD_BUDGET", "0.05"))
+
+
+# Runs once per process; st.cache_resource also keeps the result across hot reloads of page modules
+@st.cache_resource(show_spinner=False)
+def bootstrap():
+    with trace_span("app.bootstrap"):
+        enable_copy_on_write()
+        load_tenants()
+        get_scheduler()
+        get_shared_data_layer()
+        get_llm_backend()
+    return time.time()
+
+
+# `prepare` returns the keyword arguments for `render`. A cold cache makes the first prepare slow (it
+# may build the report); the budget is about warm reruns, which should only hit in-process caches.
+def run_page(render, prepare=None, **page_config):
+    start = time.perf_counter()
+    with trace_span("app.rerun_overhead"):
+        st.set_page_config(**page_config)
+        bootstrap()
+        state = prepare() if prepare else {}
+    overhead = time.perf_counter() - start
+
+    st.session_state["rerun_overhead"] = overhead
+    if overhead > RERUN_OVERHEAD_BUDGET_SECONDS:
+        logger.warning(
+            "Rerun overhead %.1f ms is over the %.1f ms budget", overhead * 1000, RERUN_OVERHEAD_BUDGET_SECONDS * 1000
+        )
+
+    with trace_span("app.render"):
+        render(**state)
+
+
+# One line for debug panels: the last rerun's overhead against the budget
+def rerun_overhead_caption():
+    overhead = st.session_state.get("rerun_overhead", 0.0)
+    status = "within" if overhead <= RERUN_OVERHEAD_BUDGET_SECONDS else "over"
+    return f"Rerun overhead {overhead * 1000:.1f} ms, {status} the {RERUN_OVERHEAD_BUDGET_SECONDS * 1000:.0f} ms budget"
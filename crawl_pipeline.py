@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import requests
+
+from page_parser import parse_batch
+
+# Two-stage site crawl for large local audits:
+#   fetch  - a thread pool downloads pages (I/O bound) into a bounded queue
+#   parse  - batches of pages go to a process pool (BeautifulSoup is CPU bound and holds the GIL)
+# The bounded queue and the cap on in-flight parse batches are the backpressure: when parsing falls
+# behind, fetch threads block on put() instead of piling raw HTML up in memory.
+#
+#   python crawl_pipeline.py https://www.example.com/ --max-pages 2000 --parse-workers 8 --output crawl.jsonl
+
+FETCH_TIMEOUT_SECONDS = 20
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_QUEUE_SIZE = 64
+
+_local = threading.local()
+
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+# Fetch one page into the queue. Every call puts exactly one item, errors included, because the
+# coordinator counts outstanding fetches down by queue items.
+def _fetch_into(url, fetched):
+    try:
+        response = _session().get(url, timeout=FETCH_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        if "html" not in response.headers.get("Content-Type", "text/html"):
+            item = (url, None, "not html")
+        else:
+            item = (url, response.text, None)
+    except Exception as e:
+        item = (url, None, f"{type(e).__name__}: {e}")
+    fetched.put(item)
+
+
+def crawl(start_urls, max_pages=100, fetch_workers=8, parse_workers=None, batch_size=DEFAULT_BATCH_SIZE,
+          queue_size=DEFAULT_QUEUE_SIZE, follow_links=True):
+    parse_workers = parse_workers or os.cpu_count() or 1
+    max_parse_batches = parse_workers * 2  # Keep every worker busy with one batch queued behind it
+
+    fetched = queue.Queue(maxsize=queue_size)
+    frontier = deque(dict.fromkeys(start_urls))
+    seen = set(frontier)
+    records, errors = [], []
+    scheduled = pending_fetches = 0
+    batch, parsing = [], {}  # In-flight parse futures and the URLs in each batch
+    stats = {"pages": 0, "errors": 0, "bytes": 0, "batches": 0}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        while frontier or pending_fetches or batch or parsing:
+            # Schedule fetches, a couple per fetch thread at most so the frontier stays in memory as URLs
+            while frontier and scheduled < max_pages and pending_fetches < fetch_workers * 2:
+                fetch_pool.submit(_fetch_into, frontier.popleft(), fetched)
+                pending_fetches += 1
+                scheduled += 1
+            if scheduled >= max_pages:
+                frontier.clear()
+
+            # Fill the current batch, but only while the parse stage has room for another one
+            if len(parsing) < max_parse_batches:
+                try:
+                    while len(batch) < batch_size and pending_fetches:
+                        url, html, error = fetched.get(timeout=0.05 if not batch else 0.01)
+                        pending_fetches -= 1
+                        if error:
+                            errors.append({"url": url, "error": error})
+                            stats["errors"] += 1
+                        else:
+                            batch.append((url, html))
+                            stats["bytes"] += len(html)
+                except queue.Empty:
+                    pass
+
+                # Hand over full batches, or whatever is left once no fetches are outstanding
+                if batch and (len(batch) >= batch_size or not pending_fetches):
+                    parsing[parse_pool.submit(parse_batch, batch)] = [url for url, _ in batch]
+                    stats["batches"] += 1
+                    batch = []
+
+            # Collect parsed batches, waiting for one when the parse stage is full
+            done = {future for future in parsing if future.done()}
+            if not done and parsing and (len(parsing) >= max_parse_batches or not (pending_fetches or batch or frontier)):
+                done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+            for future in done:
+                urls = parsing.pop(future)
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. killed for memory); keep the crawl going without this batch
+                    parsed = [{"url": url, "error": f"{type(e).__name__}: {e}"} for url in urls]
+                for record in parsed:
+                    if "error" in record:
+                        errors.append(record)
+                        stats["errors"] += 1
+                        continue
+                    records.append(record)
+                    stats["pages"] += 1
+                    if follow_links:
+                        for link in record["Links"]:
+                            if link not in seen:
+                                seen.add(link)
+                                frontier.append(link)
+
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    stats["pages_per_second"] = round(stats["pages"] / stats["seconds"], 2) if stats["seconds"] else 0.0
+    return records, errors, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a site and extract SEO fields from every page.")
+    parser.add_argument("url", nargs="+", help="Start URL(s); links are followed on the same host.")
+    parser.add_argument("--max-pages", type=int, default=100, help="Pages to fetch at most.")
+    parser.add_argument("--fetch-workers", type=int, default=8, help="Concurrent page downloads.")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Parser processes (defaults to CPU count).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Pages per parse batch.")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Fetched pages buffered before fetching blocks.")
+    parser.add_argument("--no-follow", action="store_true", help="Only parse the given URLs.")
+    parser.add_argument("--output", help="Write one JSON record per page to this file.")
+    args = parser.parse_args()
+
+    records, errors, stats = crawl(
+        args.url,
+        max_pages=args.max_pages,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        follow_links=not args.no_follow,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    for error in errors:
+        print(f"{error['url']}: failed - {error['error']}")
+    print(
+        f"Parsed {stats['pages']} pages ({stats['bytes'] / 1e6:.1f} MB) in {stats['batches']} batches, "
+        f"{stats['errors']} errors, {stats['seconds']}s, {stats['pages_per_second']} pages/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
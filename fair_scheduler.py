@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future
+
+
+# Thread pool that serves tenants round-robin so one busy site can't starve the others
+class FairScheduler:
+    def __init__(self, max_workers=8, per_tenant_limit=2):
+        self.max_workers = max_workers
+        self.per_tenant_limit = per_tenant_limit
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()  # tenant_id -> deque of pending jobs, in round-robin order
+        self._in_flight = defaultdict(int)
+        self._shutdown = False
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"fair-scheduler-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, tenant_id, fn, *args, **kwargs):
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit to a scheduler that has been shut down.")
+            self._queues.setdefault(tenant_id, deque()).append((future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    # Pick the next job from the first tenant in rotation that is under its concurrency limit
+    def _next_job(self):
+        for tenant_id in list(self._queues):
+            if self._in_flight[tenant_id] >= self.per_tenant_limit:
+                continue
+            queue = self._queues.pop(tenant_id)
+            job = queue.popleft()
+            if queue:
+                self._queues[tenant_id] = queue  # Re-insert at the back of the rotation
+            return tenant_id, job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                next_job = self._next_job()
+                while next_job is None:
+                    if self._shutdown and not self._queues:
+                        return
+                    self._cond.wait()
+                    next_job = self._next_job()
+                tenant_id, (future, fn, args, kwargs) = next_job
+                self._in_flight[tenant_id] += 1
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._cond:
+                self._in_flight[tenant_id] -= 1
+                if not self._in_flight[tenant_id]:
+                    del self._in_flight[tenant_id]
+                self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return {tenant_id: len(queue) for tenant_id, queue in self._queues.items()}
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+_scheduler_lock = threading.Lock()
+_scheduler = None
+
+
+# Process-wide scheduler shared by every session
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler()
+        return _scheduler
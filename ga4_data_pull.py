@@ -1,23 +1,58 @@
+import hashlib
+import threading
 import pandas as pd
 from datetime import date, timedelta
 import calendar
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import RunReportRequest, DateRange, Dimension, Metric
+from google.analytics.data_v1beta.types import RunReportRequest, DateRange, Dimension, Metric, FilterExpression, Filter
 import streamlit as st
 import plotly.express as px
-
-# Load the secrets for the service account path and property ID
-service_account_info = st.secrets["google_service_account"]
-property_id = st.secrets["google_service_account"]["property_id"]
-
-# Initialize GA Client using the service account JSON
-client = BetaAnalyticsDataClient.from_service_account_info(service_account_info)
+from perf_tracing import traced
+from tenants import get_service_account_info, tenant_cached
+from landing_page_aggregator import LandingPageAccumulator, LEAD_EVENT
+from report_schema import compact_frame, lookup
+from shared_data import get_shared_data_layer
+from ranking import top_k
+
+# GA Clients are pooled per service account and shared across tenants and sessions
+_client_lock = threading.Lock()
+_clients = {}
+
+def get_ga4_client(tenant):
+    with _client_lock:
+        if tenant.service_account not in _clients:
+            _clients[tenant.service_account] = BetaAnalyticsDataClient.from_service_account_info(
+                get_service_account_info(tenant)
+            )
+        return _clients[tenant.service_account]
+
+# GA4 caps a report at 10,000 rows unless a limit is set, so every fetch pages through with limit and offset
+REPORT_PAGE_SIZE = 100000
+
+def run_paged_report(tenant, request, page_size=REPORT_PAGE_SIZE):
+    client = get_ga4_client(tenant)
+    rows = []
+    row_count = 0
+    while True:
+        request.limit = page_size
+        request.offset = len(rows)
+        response = client.run_report(request)
+        rows.extend(response.rows)
+        row_count = response.row_count
+        if not response.rows or len(rows) >= row_count:
+            break
+
+    if len(rows) < row_count:
+        raise RuntimeError(f"GA4 report returned {len(rows)} of {row_count} rows")
+    return rows
 
 # Get traffic by source
-def fetch_metrics_by_source(start_date, end_date):
+@traced("ga4.fetch_metrics_by_source")
+@tenant_cached
+def fetch_metrics_by_source(start_date, end_date, tenant=None):
     # Define the request to pull data aggregated by source
     request = RunReportRequest(
-        property=f"properties/{property_id}",
+        property=f"properties/{tenant.property_id}",
         dimensions=[Dimension(name="sessionSource"), Dimension(name="date")],  # Added 'date' dimension
         metrics=[
             Metric(name="activeUsers"),
@@ -30,48 +65,41 @@ def fetch_metrics_by_source(start_date, end_date):
         date_ranges=[DateRange(start_date=start_date, end_date=end_date)],  # Define date range
     )
 
-    response = client.run_report(request)
-    
     # Parse the response and create the dataframe for source-level metrics
     rows = []
-    for row in response.rows:
+    for row in run_paged_report(tenant, request):
         session_source = row.dimension_values[0].value
         date = row.dimension_values[1].value  # Capture the date
         
-        # Convert all metrics to numeric values (with coercion to handle non-numeric data)
-        active_users = pd.to_numeric(row.metric_values[0].value, errors='coerce')
-        sessions = pd.to_numeric(row.metric_values[1].value, errors='coerce')
-        pageviews = pd.to_numeric(row.metric_values[2].value, errors='coerce')
-        bounce_rate = pd.to_numeric(row.metric_values[3].value, errors='coerce')
-        avg_session_duration = pd.to_numeric(row.metric_values[4].value, errors='coerce')
-        new_users = pd.to_numeric(row.metric_values[5].value, errors='coerce')
+        # Metrics stay as strings here, compact_frame converts whole columns at once
+        active_users = row.metric_values[0].value
+        sessions = row.metric_values[1].value
+        pageviews = row.metric_values[2].value
+        bounce_rate = row.metric_values[3].value
+        avg_session_duration = row.metric_values[4].value
+        new_users = row.metric_values[5].value
         
         rows.append([
             date, session_source, active_users, sessions, pageviews, bounce_rate, avg_session_duration, new_users
         ])
     
-    # Create DataFrame for metrics by source
-    df_source_metrics = pd.DataFrame(rows, columns=[
+    # Create DataFrame for metrics by source, converted to the compact schema
+    df_source_metrics = compact_frame(pd.DataFrame(rows, columns=[
         'Date', 'Session Source', 'Total Visitors', 'Sessions', 'Pageviews', 'Bounce Rate', 'Average Session Duration', 'New Users'
-    ])
-    
-    # Convert all numeric columns to proper numeric types
-    numeric_cols = ['Total Visitors', 'Sessions', 'Pageviews', 'Bounce Rate', 'Average Session Duration', 'New Users']
-    for col in numeric_cols:
-        df_source_metrics[col] = pd.to_numeric(df_source_metrics[col], errors='coerce')
+    ]))
     
     # Process data for easier handling
     df_source_metrics.sort_values(by='Session Source', inplace=True)
-
-    df_source_metrics['Date'] = pd.to_datetime(df_source_metrics['Date']).dt.date
     
     return df_source_metrics
 
 # Get data by landing page
-def fetch_metrics_by_landing_page(start_date, end_date):
+@traced("ga4.fetch_metrics_by_landing_page")
+@tenant_cached
+def fetch_metrics_by_landing_page(start_date, end_date, tenant=None):
     # Define the request to pull data aggregated by landing page
     request = RunReportRequest(
-        property=f"properties/{property_id}",
+        property=f"properties/{tenant.property_id}",
         dimensions=[Dimension(name="pagePath"), Dimension(name="date")],  # Added 'date' dimension
         metrics=[
             Metric(name="activeUsers"),
@@ -84,35 +112,28 @@ def fetch_metrics_by_landing_page(start_date, end_date):
         date_ranges=[DateRange(start_date=start_date, end_date=end_date)],  # Define date range
     )
 
-    response = client.run_report(request)
-    
     # Parse the response and create the dataframe for landing page-level metrics
     rows = []
-    for row in response.rows:
+    for row in run_paged_report(tenant, request):
         page_path = row.dimension_values[0].value
         date = row.dimension_values[1].value  # Capture the date
         
-        # Convert all metrics to numeric values (with coercion to handle non-numeric data)
-        active_users = pd.to_numeric(row.metric_values[0].value, errors='coerce')
-        sessions = pd.to_numeric(row.metric_values[1].value, errors='coerce')
-        pageviews = pd.to_numeric(row.metric_values[2].value, errors='coerce')
-        bounce_rate = pd.to_numeric(row.metric_values[3].value, errors='coerce')
-        avg_session_duration = pd.to_numeric(row.metric_values[4].value, errors='coerce')
-        new_users = pd.to_numeric(row.metric_values[5].value, errors='coerce')
+        # Metrics stay as strings here, compact_frame converts whole columns at once
+        active_users = row.metric_values[0].value
+        sessions = row.metric_values[1].value
+        pageviews = row.metric_values[2].value
+        bounce_rate = row.metric_values[3].value
+        avg_session_duration = row.metric_values[4].value
+        new_users = row.metric_values[5].value
         
         rows.append([
             date, page_path, active_users, sessions, pageviews, bounce_rate, avg_session_duration, new_users
         ])
     
-    # Create DataFrame for metrics by landing page
-    df_landing_page_metrics = pd.DataFrame(rows, columns=[
+    # Create DataFrame for metrics by landing page, converted to the compact schema
+    df_landing_page_metrics = compact_frame(pd.DataFrame(rows, columns=[
         'Date', 'Page Path', 'Total Visitors', 'Sessions', 'Pageviews', 'Bounce Rate', 'Average Session Duration', 'New Users'
-    ])
-    
-    # Convert all numeric columns to proper numeric types
-    numeric_cols = ['Total Visitors', 'Sessions', 'Pageviews', 'Bounce Rate', 'Average Session Duration', 'New Users']
-    for col in numeric_cols:
-        df_landing_page_metrics[col] = pd.to_numeric(df_landing_page_metrics[col], errors='coerce')
+    ]))
     
     # Process data for easier handling
     df_landing_page_metrics.sort_values(by='Page Path', inplace=True)
@@ -121,10 +142,12 @@ def fetch_metrics_by_landing_page(start_date, end_date):
 
 
 #  Get Conversions
-def fetch_metrics_by_event(start_date, end_date):
+@traced("ga4.fetch_metrics_by_event")
+@tenant_cached
+def fetch_metrics_by_event(start_date, end_date, tenant=None):
     # Define the request to pull data aggregated by event name
     request = RunReportRequest(
-        property=f"properties/{property_id}",
+        property=f"properties/{tenant.property_id}",
         dimensions=[Dimension(name="eventName"), Dimension(name="date")],  # Added 'date' dimension
         metrics=[
             Metric(name="eventCount"),  # Focus on the event count
@@ -132,24 +155,18 @@ def fetch_metrics_by_event(start_date, end_date):
         date_ranges=[DateRange(start_date=start_date, end_date=end_date)],  # Define date range
     )
 
-    response = client.run_report(request)
-    
     # Parse the response and create the dataframe for event-level metrics
     rows = []
-    for row in response.rows:
+    for row in run_paged_report(tenant, request):
         event_name = row.dimension_values[0].value
         date = row.dimension_values[1].value  # Capture the date
         
-        # Convert event count to numeric (with coercion to handle non-numeric data)
-        event_count = pd.to_numeric(row.metric_values[0].value, errors='coerce')
+        event_count = row.metric_values[0].value
         
         rows.append([date, event_name, event_count])
     
-    # Create DataFrame for metrics by event name
-    df_event_metrics = pd.DataFrame(rows, columns=['Date', 'Event Name', 'Event Count'])
-    
-    # Convert the 'Event Count' to numeric
-    df_event_metrics['Event Count'] = pd.to_numeric(df_event_metrics['Event Count'], errors='coerce')
+    # Create DataFrame for metrics by event name, converted to the compact schema
+    df_event_metrics = compact_frame(pd.DataFrame(rows, columns=['Date', 'Event Name', 'Event Count']))
     
     # Sort data for easier handling
     df_event_metrics.sort_values(by='Event Count', ascending=False, inplace=True)
@@ -157,17 +174,53 @@ def fetch_metrics_by_event(start_date, end_date):
     return df_event_metrics
 
 
+# Get conversions by date, source and page in one report so they can be attributed without merging frames
+@traced("ga4.fetch_event_attribution")
+@tenant_cached
+def fetch_event_attribution(start_date, end_date, event_names=(LEAD_EVENT,), tenant=None):
+    # Only the conversion events are requested, which keeps the report sparse
+    request = RunReportRequest(
+        property=f"properties/{tenant.property_id}",
+        dimensions=[
+            Dimension(name="date"),
+            Dimension(name="sessionSource"),
+            Dimension(name="pagePath"),
+            Dimension(name="eventName"),
+        ],
+        metrics=[Metric(name="eventCount")],
+        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
+        dimension_filter=FilterExpression(
+            filter=Filter(field_name="eventName", in_list_filter=Filter.InListFilter(values=list(event_names)))
+        ),
+    )
+    rows = [
+        [value.value for value in row.dimension_values] + [row.metric_values[0].value]
+        for row in run_paged_report(tenant, request)
+    ]
+
+    return compact_frame(pd.DataFrame(rows, columns=['Date', 'Session Source', 'Page Path', 'Event Name', 'Event Count']))
+
+
+# Sparse conversion counts per key (e.g. "Session Source" or "Page Path"), for joining onto summaries by lookup
+def build_conversion_index(attribution_data, key, event_name=LEAD_EVENT):
+    if key not in attribution_data.columns:
+        return pd.Series(dtype="float64")
+    conversions = attribution_data[attribution_data['Event Name'] == event_name]
+    return pd.to_numeric(conversions['Event Count'], errors='coerce').fillna(0).groupby(
+        conversions[key].astype(object)
+    ).sum()
+
+
 # Summarize acquisition data
+@traced("ga4.summarize_acquisition_sources")
 def summarize_acquisition_sources(acquisition_data, event_data):
-    # Ensure the Date column is in datetime format and convert to date
-    acquisition_data['Date'] = pd.to_datetime(acquisition_data['Date'], errors='coerce').dt.date
-
     # Get the date 30 days ago
     today = date.today()
-    start_of_period = today - timedelta(days=30)
+    start_of_period = pd.Timestamp(today - timedelta(days=30))
     
-    # Filter data for the last 30 days
-    monthly_data = acquisition_data[acquisition_data['Date'] >= start_of_period]
+    # Filter data for the last 30 days (a copy, fetched frames are cached and shared between sessions)
+    acquisition_dates = pd.to_datetime(acquisition_data['Date'], errors='coerce')
+    monthly_data = acquisition_data[acquisition_dates >= start_of_period].copy()
     
     # Check if required columns are in the dataframe
     required_cols = ["Session Source", "Sessions", "Bounce Rate"]
@@ -178,19 +231,17 @@ def summarize_acquisition_sources(acquisition_data, event_data):
     monthly_data["Sessions"] = pd.to_numeric(monthly_data["Sessions"], errors='coerce').fillna(0)
     monthly_data["Bounce Rate"] = pd.to_numeric(monthly_data["Bounce Rate"], errors='coerce').fillna(0)
     
-    # Merge the traffic data with the event data to include leads
-    monthly_data = monthly_data.merge(event_data[['Page Path', 'Event Count']], on='Page Path', how='left')
-
-    # Fill missing values in Event Count with 0 for pages without leads
-    monthly_data['Event Count'].fillna(0, inplace=True)
-
     # Group by Session Source to get aggregated metrics
-    source_summary = monthly_data.groupby("Session Source").agg(
+    source_summary = monthly_data.groupby("Session Source", observed=True).agg(
         Sessions=("Sessions", "sum"),
         Bounce_Rate=("Bounce Rate", "mean"),
-        Conversions=("Event Count", "sum")  # Use Event Count for conversions (leads)
     ).reset_index()
 
+    # Look up leads per source from the attribution report over the same period
+    event_dates = pd.to_datetime(event_data['Date'], errors='coerce')
+    conversions = build_conversion_index(event_data[event_dates >= start_of_period], "Session Source")
+    source_summary["Conversions"] = lookup(source_summary["Session Source"], conversions)
+
     # Calculate Conversion Rate (%) for each source
     source_summary["Conversion Rate (%)"] = (source_summary["Conversions"] / source_summary["Sessions"] * 100).round(2)
 
@@ -200,52 +251,27 @@ def summarize_acquisition_sources(acquisition_data, event_data):
     return source_summary
 
 # Summarize Landing Pages
+@traced("ga4.summarize_landing_pages")
 def summarize_landing_pages(acquisition_data, event_data):
     # Ensure that 'Page Path' exists in acquisition_data or handle differently
     if 'Page Path' not in acquisition_data.columns:
         raise ValueError("Data does not contain a 'Page Path' column.")
-    
-    # Convert columns to numeric, if possible, and fill NaNs
-    numeric_cols = ["Sessions", "Bounce Rate", "Total Visitors", "Pageviews", "Average Session Duration"]
-    for col in numeric_cols:
-        acquisition_data[col] = pd.to_numeric(acquisition_data[col], errors='coerce').fillna(0)
-
-    # Create a column for 'Leads', filtering event data where Event Name is 'generate_lead'
-    event_data_filtered = event_data[event_data['Event Name'] == 'generate_lead']
-    
-    # Ensure that 'Event Count' is numeric
-    event_data_filtered['Event Count'] = pd.to_numeric(event_data_filtered['Event Count'], errors='coerce').fillna(0)
-    
-    # Create a new column for Leads and set it for Contact page only
-    acquisition_data['Leads'] = 0  # Initialize Leads to 0 for all pages
-    acquisition_data.loc[acquisition_data['Page Path'] == '/contact', 'Leads'] = event_data_filtered['Event Count'].sum()
-
-    # Group by Page Path to get aggregated metrics
-    page_summary = acquisition_data.groupby("Page Path").agg(
-        Sessions=("Sessions", "sum"),
-        Total_Visitors=("Total Visitors", "sum"),
-        Pageviews=("Pageviews", "sum"),
-        Avg_Session_Duration=("Average Session Duration", "mean"),
-        Bounce_Rate=("Bounce Rate", "mean"),
-        Conversions=("Leads", "sum")  # Use 'Leads' for conversions
-    ).reset_index()
-
-    # Calculate Conversion Rate
-    page_summary["Conversion Rate (%)"] = (page_summary["Conversions"] / page_summary["Sessions"] * 100).round(2)
 
-    # Sort by Sessions in descending order
-    page_summary = page_summary.sort_values(by="Sessions", ascending=False)
-    
-    return page_summary
+    # Fold the rows into a fresh accumulator: session-weighted averages, leads counted once per page
+    accumulator = LandingPageAccumulator()
+    accumulator.fold(acquisition_data, event_data)
+    return accumulator.summary()
 
 
 # Get this months summary
+@traced("ga4.summarize_monthly_data")
 def summarize_monthly_data(monthly_data, event_data):
-    # Ensure the Date column is in datetime format, then convert to date
+    # Ensure the Date column is present
     if 'Date' not in monthly_data.columns:
         raise ValueError("Data does not contain a 'Date' column.")
-    
-    monthly_data['Date'] = pd.to_datetime(monthly_data['Date'], errors='coerce').dt.date
+
+    # Work on a copy, fetched frames are cached and shared between sessions
+    monthly_data = monthly_data.copy()
     
     # Check if required columns are in the dataframe
     required_cols = ["Total Visitors", "New Users", "Sessions", "Average Session Duration", "Session Source"]
@@ -257,17 +283,8 @@ def summarize_monthly_data(monthly_data, event_data):
     for col in numeric_cols:
         monthly_data[col] = pd.to_numeric(monthly_data[col], errors='coerce').fillna(0)
 
-    # Filter event data to include only "generate_lead" events and calculate total leads
-    event_data_filtered = event_data[event_data['Event Name'] == 'generate_lead']
-
     # Sum the "Event Count" for "generate_lead" events to get total leads
-    total_leads = event_data_filtered['Event Count'].sum()
-
-    # Add a new column "Leads" to the acquisition data and set it to 0 by default
-    monthly_data['Leads'] = 0
-    
-    # Set the "Leads" column for the Contact page
-    monthly_data.loc[monthly_data['Session Source'] == 'Contact', 'Leads'] = total_leads
+    total_leads = event_data.loc[event_data['Event Name'] == LEAD_EVENT, 'Event Count'].sum()
     
     # Calculate total metrics for the last 30 days
     total_visitors = monthly_data["Total Visitors"].sum()
@@ -283,66 +300,22 @@ def summarize_monthly_data(monthly_data, event_data):
         "Value": [total_visitors, new_visitors, total_sessions, total_leads, avg_time_on_site]
     })
 
-    # Summarize acquisition metrics (using Event Count for leads)
-    acquisition_summary = monthly_data.groupby("Session Source").agg(
+    # Summarize acquisition metrics
+    acquisition_summary = monthly_data.groupby("Session Source", observed=True).agg(
         Visitors=("Total Visitors", "sum"),
         Sessions=("Sessions", "sum"),
-        Leads=("Leads", "sum")  # Sum of leads for the Contact page
     ).reset_index()
+
+    # Leads per source come from the attribution report (zero when only plain event counts are given)
+    leads_by_source = build_conversion_index(event_data, "Session Source")
+    acquisition_summary["Leads"] = lookup(acquisition_summary["Session Source"], leads_by_source)
     
     return summary_df, acquisition_summary
 
+@traced("ga4.summarize_last_month_data")
 def summarize_last_month_data(prev_monthly_data, event_data):
-    # Ensure the Date column is in datetime format, then convert to date
-    if 'Date' not in prev_monthly_data.columns:
-        raise ValueError("Data does not contain a 'Date' column.")
-    
-    prev_monthly_data['Date'] = pd.to_datetime(prev_monthly_data['Date'], errors='coerce').dt.date
-    
-    # Check if required columns are in the dataframe
-    required_cols = ["Total Visitors", "New Users", "Sessions", "Average Session Duration", "Session Source"]
-    if not all(col in prev_monthly_data.columns for col in required_cols):
-        raise ValueError("Data does not contain required columns.")
-    
-    # Convert columns to numeric, if possible, and fill NaNs
-    numeric_cols = ["Total Visitors", "New Users", "Sessions", "Average Session Duration"]
-    for col in numeric_cols:
-        prev_monthly_data[col] = pd.to_numeric(prev_monthly_data[col], errors='coerce').fillna(0)
-    
-    # Filter event data to include only "generate_lead" events
-    event_data_filtered = event_data[event_data['Event Name'] == 'generate_lead']
-
-    # Sum the "Event Count" for "generate_lead" events to get total leads
-    total_leads = event_data_filtered['Event Count'].sum()
-
-    # Add a new column "Leads" to the acquisition data and set it to 0 by default
-    prev_monthly_data['Leads'] = 0
-    
-    # Set the "Leads" column for the Contact page
-    prev_monthly_data.loc[prev_monthly_data['Session Source'] == 'Contact', 'Leads'] = total_leads
-    
-    # Calculate total metrics for the last month
-    total_visitors = prev_monthly_data["Total Visitors"].sum()
-    new_visitors = prev_monthly_data["New Users"].sum()
-    total_sessions = prev_monthly_data["Sessions"].sum()
-
-    # Calculate average metrics for the last month
-    avg_time_on_site = prev_monthly_data["Average Session Duration"].mean().round(2)
-    
-    # Create a summary DataFrame
-    summary_df = pd.DataFrame({
-        "Metric": ["Total Visitors", "New Visitors", "Total Sessions", "Total Leads", "Average Session Duration"],
-        "Value": [total_visitors, new_visitors, total_sessions, total_leads, avg_time_on_site]
-    })
-
-    # Summarize acquisition metrics (using Event Count for leads)
-    acquisition_summary = prev_monthly_data.groupby("Session Source").agg(
-        Visitors=("Total Visitors", "sum"),
-        Sessions=("Sessions", "sum"),
-        Leads=("Leads", "sum")  # Sum of leads for the Contact page
-    ).reset_index()
-    
-    return summary_df, acquisition_summary
+    # Same summary as this month, just over the previous period
+    return summarize_monthly_data(prev_monthly_data, event_data)
 
 
 # Generate all metrics
@@ -397,11 +370,42 @@ def generate_all_metrics_copy(current_summary_df, last_month_summary_df):
         )
 
 
-def plot_acquisition_pie_chart_plotly(acquisition_summary):
-    # Filter data for pie chart
-    source_data = acquisition_summary[['Session Source', 'Visitors']].copy()
+# Sources shown individually in the pie chart, the rest are grouped as "Other"
+PIE_TOP_N = 8
+CHART_CACHE_SECONDS = 24 * 60 * 60
+
+# Keep the biggest sources and fold the long tail into "Other" so the chart payload stays small
+def bucket_top_sources(acquisition_summary, top_n=PIE_TOP_N):
+    source_data = pd.DataFrame({
+        'Session Source': acquisition_summary['Session Source'].astype(object),
+        'Visitors': acquisition_summary['Visitors'],
+    })
     source_data = source_data[source_data['Visitors'] > 0]  # Exclude sources with no visitors
-    
+    if len(source_data) <= top_n:
+        return source_data
+
+    top_sources = source_data.nlargest(top_n, 'Visitors')
+    other = pd.DataFrame({
+        'Session Source': ['Other'],
+        'Visitors': [source_data['Visitors'].sum() - top_sources['Visitors'].sum()],
+    })
+    return pd.concat([top_sources, other], ignore_index=True)
+
+def content_hash(df):
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+# Pie figure memoized on the summary's content, so reruns and other sessions reuse the same figure
+def build_acquisition_pie_chart(acquisition_summary, top_n=PIE_TOP_N):
+    chart_data = pd.DataFrame({
+        'Session Source': acquisition_summary['Session Source'].astype(object),
+        'Visitors': acquisition_summary['Visitors'],
+    })
+    key = ("acquisition_pie_chart", content_hash(chart_data), top_n)
+    return get_shared_data_layer().get_or_compute(
+        key, lambda: _make_acquisition_pie_chart(bucket_top_sources(chart_data, top_n)), ttl_seconds=CHART_CACHE_SECONDS
+    )
+
+def _make_acquisition_pie_chart(source_data):
     # Create pie chart with Plotly
     fig = px.pie(
         source_data,
@@ -414,14 +418,17 @@ def plot_acquisition_pie_chart_plotly(acquisition_summary):
     
     # Update layout to place labels outside
     fig.update_traces(textposition='outside', textinfo='label+percent', showlegend=False)
+    return fig
 
+
+def plot_acquisition_pie_chart_plotly(acquisition_summary, top_n=PIE_TOP_N):
     # Display in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_acquisition_pie_chart(acquisition_summary, top_n), use_container_width=True)
 
 
 def describe_top_sources(acquisition_summary):
-    # Sort by Visitors and take the top 3
-    top_sources = acquisition_summary.sort_values(by='Visitors', ascending=False).head(3)
+    # Take the top 3 by Visitors
+    top_sources = top_k(acquisition_summary, 3, by='Visitors')
     
     # Hard-coded descriptions for specific sources
     descriptions = {
@@ -445,36 +452,52 @@ def describe_top_sources(acquisition_summary):
     "<span style='font-size:18px;'>**Top Sources Overview**</span>", 
     unsafe_allow_html=True
     )
-    for _, row in top_sources.iterrows():
-        source = row['Session Source']
-        visitors = row['Visitors']
-        
+    for source, visitors in zip(top_sources['Session Source'], top_sources['Visitors']):
         st.markdown(f"**{source} - {visitors} visitors**")
         st.markdown(f"{descriptions.get(source, 'Description not available for this source.')}")
 
-def generate_page_summary(landing_page_summary):
-    # Map page paths to friendly names
-    page_name_map = {
-        "/": "Home",
-        "/contact": "Contact",
-        "/ratesinsurance": "Rates & Insurance",
-        "/about": "About",
-        "/faqs": "FAQs",
-        "/adults-nutrition-counseling": "Adults",
-        "/teens-nutrition-counseling": "Teens"
-    }
-
+# Map page paths to friendly names
+PAGE_NAME_MAP = {
+    "/": "Home",
+    "/contact": "Contact",
+    "/ratesinsurance": "Rates & Insurance",
+    "/about": "About",
+    "/faqs": "FAQs",
+    "/adults-nutrition-counseling": "Adults",
+    "/teens-nutrition-counseling": "Teens"
+}
+
+def filter_named_pages(landing_page_summary):
     # Filter the DataFrame to only include the specified pages
-    filtered_summary = landing_page_summary[landing_page_summary["Page Path"].isin(page_name_map.keys())]
+    filtered_summary = landing_page_summary[landing_page_summary["Page Path"].isin(PAGE_NAME_MAP.keys())].copy()
 
     # Rename Page Path to friendly names
-    filtered_summary["Page Name"] = filtered_summary["Page Path"].map(page_name_map)
+    filtered_summary["Page Name"] = filtered_summary["Page Path"].map(PAGE_NAME_MAP)
+    return filtered_summary
 
+# Build the page performance text sent to the LLM, without rendering anything
+def build_page_summary_text(landing_page_summary):
     # Initialize a summary string to track all page info for LLM
     llm_summary = "### Page Performance Summary\n\n"
 
-    # Display summary for each relevant page and append to LLM summary
-    for _, row in filtered_summary.iterrows():
+    for _, row in filter_named_pages(landing_page_summary).iterrows():
+        page_name = row["Page Name"]
+        avg_session_duration = round(row["Avg_Session_Duration"], 2)
+
+        llm_summary += (
+            f"**{page_name}**: Visitors: {row['Total_Visitors']}, "
+            f"Sessions: {row['Sessions']}, "
+            f"Average Session Duration: {avg_session_duration} seconds"
+        )
+        if page_name == "Contact":
+            llm_summary += f", Conversion Rate: {row['Conversion Rate (%)']}%"
+        llm_summary += "\n\n"
+
+    return llm_summary
+
+def generate_page_summary(landing_page_summary):
+    # Display summary for each relevant page
+    for _, row in filter_named_pages(landing_page_summary).iterrows():
         page_name = row["Page Name"]
         visitors = row["Total_Visitors"]
         sessions = row["Sessions"]
@@ -492,16 +515,6 @@ def generate_page_summary(landing_page_summary):
             f"{conversion_rate}",
             unsafe_allow_html=True
         )
-        
-        # Append to LLM summary
-        llm_summary += (
-            f"**{page_name}**: Visitors: {visitors}, "
-            f"Sessions: {sessions}, "
-            f"Average Session Duration: {avg_session_duration} seconds"
-        )
-        if page_name == "Contact":
-            llm_summary += f", Conversion Rate: {row['Conversion Rate (%)']}%"
-        llm_summary += "\n\n"
 
     # Store LLM summary in session state for later use
-    st.session_state["page_summary_llm"] = llm_summary
+    st.session_state["page_summary_llm"] = build_page_summary_text(landing_page_summary)
@@ -1,23 +1,41 @@
+import threading
 import pandas as pd
 from googleapiclient.discovery import build
 from datetime import datetime, timedelta
 from google.oauth2 import service_account
-import streamlit as st
+from perf_tracing import traced
+from tenants import get_service_account_info, tenant_cached
+from report_schema import compact_frame
+from search_console_table import SearchConsoleTable
+from ranking import top_k, format_digest
 
-# Define the Google Search Console property URL
-PROPERTY_URL = 'https://www.chelseawnutrition.com/'  # Replace with your actual website URL in Search Console
+DETAIL_PAGE_SIZE = 25000  # API maximum rows per call
+SEARCH_DETAIL_DAYS = 90  # Days of query x page x date rows kept for slicing by page and date
 
-# Load the service account credentials from Streamlit secrets
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["google_service_account"],
-    scopes=['https://www.googleapis.com/auth/webmasters.readonly']
-)
+# Credentials are shared per service account; the discovery client isn't thread-safe so each thread builds its own
+_credentials_lock = threading.Lock()
+_credentials = {}
+_local = threading.local()
 
-# Initialize the Google Search Console service
-service = build('searchconsole', 'v1', credentials=credentials)
+def get_search_console_service(tenant):
+    with _credentials_lock:
+        if tenant.service_account not in _credentials:
+            _credentials[tenant.service_account] = service_account.Credentials.from_service_account_info(
+                get_service_account_info(tenant),
+                scopes=['https://www.googleapis.com/auth/webmasters.readonly']
+            )
+        credentials = _credentials[tenant.service_account]
+
+    if not hasattr(_local, "services"):
+        _local.services = {}
+    if tenant.service_account not in _local.services:
+        _local.services[tenant.service_account] = build('searchconsole', 'v1', credentials=credentials)
+    return _local.services[tenant.service_account]
 
 # Define a function to fetch Google Search Console data
-def fetch_search_console_data(start_date=None, end_date=None):
+@traced("gsc.fetch_search_console_data")
+@tenant_cached
+def fetch_search_console_data(start_date=None, end_date=None, tenant=None):
     # Default to last 30 days if no date range is provided
     if not start_date:
         end_date = datetime.today()
@@ -37,7 +55,8 @@ def fetch_search_console_data(start_date=None, end_date=None):
     }
     
     # Run the query
-    response = service.searchanalytics().query(siteUrl=PROPERTY_URL, body=request).execute()
+    service = get_search_console_service(tenant)
+    response = service.searchanalytics().query(siteUrl=tenant.site_url, body=request).execute()
     
     # Parse response into a list of rows
     rows = []
@@ -49,32 +68,65 @@ def fetch_search_console_data(start_date=None, end_date=None):
         position = row.get('position', 0)
         rows.append([query, impressions, clicks, ctr, position])
     
-    # Load the data into a DataFrame
-    df = pd.DataFrame(rows, columns=['Search Query', 'Impressions', 'Clicks', 'CTR', 'Avg. Position'])
+    # Load the data into a DataFrame, converted to the compact schema
+    df = compact_frame(pd.DataFrame(rows, columns=['Search Query', 'Impressions', 'Clicks', 'CTR', 'Avg. Position']))
     return df
 
 
-# Function to create a summary of the top 30 search queries for LLM consumption
-def summarize_search_queries(search_data):
-    # Ensure necessary columns are present
-    if not all(col in search_data.columns for col in ["Search Query", "Impressions", "Clicks", "Avg. Position"]):
-        raise ValueError("Data does not contain required columns.")
+# Query x page x date rows for the range, paged through with startRow and stored as an indexed table
+@traced("gsc.fetch_search_console_detail")
+@tenant_cached
+def fetch_search_console_detail(start_date, end_date, tenant=None):
+    service = get_search_console_service(tenant)
+    queries, pages, dates, impressions, clicks, positions = [], [], [], [], [], []
+    start_row = 0
+    while True:
+        request = {
+            'startDate': start_date,
+            'endDate': end_date,
+            'dimensions': ['query', 'page', 'date'],
+            'searchType': 'web',
+            'rowLimit': DETAIL_PAGE_SIZE,
+            'startRow': start_row
+        }
+        response = service.searchanalytics().query(siteUrl=tenant.site_url, body=request).execute()
+        rows = response.get('rows', [])
+        for row in rows:
+            query, page, day = row['keys']
+            queries.append(query)
+            pages.append(page)
+            dates.append(day)
+            impressions.append(row.get('impressions', 0))
+            clicks.append(row.get('clicks', 0))
+            positions.append(row.get('position', 0))
+        if len(rows) < DETAIL_PAGE_SIZE:
+            break
+        start_row += len(rows)
+
+    return SearchConsoleTable(queries, pages, dates, impressions, clicks, positions)
+
+
+# Function to create a summary of the top 30 search queries for LLM consumption.
+# Queries are ranked by Avg. Position unless ranking weights are given (see ranking.score).
+@traced("gsc.summarize_search_queries")
+def summarize_search_queries(search_data, page=None, start_date=None, end_date=None, weights=None):
+    # The detail table answers the top 30 from its indexes, optionally for one page or date range
+    if isinstance(search_data, SearchConsoleTable):
+        top_queries = search_data.top_k(30, by="Avg. Position", weights=weights, page=page, start=start_date, end=end_date)
+    else:
+        # Ensure necessary columns are present
+        if not all(col in search_data.columns for col in ["Search Query", "Impressions", "Clicks", "Avg. Position"]):
+            raise ValueError("Data does not contain required columns.")
+        top_queries = top_k(search_data, 30, by="Avg. Position", ascending=True, weights=weights)
 
-    # Sort by Avg. Position and select top 30
-    top_queries = search_data.sort_values(by="Avg. Position").head(30)
-    top_queries["Avg. Position"] = top_queries["Avg. Position"].round(0).astype(int)
-    
     # Format the summary as a readable text
     summary = "Top 30 Search Queries Summary:\n"
     summary += "Query | Impressions | Clicks | Avg. Position\n"
     summary += "-" * 50 + "\n"
-
-    for _, row in top_queries.iterrows():
-        query = row["Search Query"]
-        impressions = row["Impressions"]
-        clicks = row["Clicks"]
-        avg_position = row["Avg. Position"]
-        
-        summary += f"{query} | {impressions} | {clicks} | {avg_position},\n"
-    
+    summary += format_digest(
+        top_queries,
+        ["Search Query", "Impressions", "Clicks", "Avg. Position"],
+        line_end=",\n",
+        formats={"Avg. Position": lambda position: int(round(position))},
+    )
     return summary
@@ -1,38 +1,23 @@
-import openai
 import streamlit as st
 import pandas as pd
-from datetime import date, timedelta
-from ga4_data_pull import *
-from gsc_data_pull import *
-from llm_integration import *
+from datetime import timedelta
 from urllib.parse import quote
-
-# Page configuration
-st.set_page_config(page_title="BizBuddy", layout="wide", page_icon = "🤓")
-
-st.markdown("<h1 style='text-align: center;'>Welcome to BizBuddy: Let's Grow Your Digital Presence</h1>", unsafe_allow_html=True)
-
-def generate_seo_insights(search_data):
-   # Prepare the search query list
-   query_list = search_data["Search Query"].unique()
-   formatted_queries = "\n".join(query_list)
-
-   # Define the prompt for the LLM
-   prompt = (
-   "Here are the search queries this website currently appears for:\n"
-   f"{formatted_queries}\n\n"
-   "Based on this data, please provide the following, make sure to bold any suggested keywords:\n"
-   "- Target search terms that align with the website's goals.\n"
-   "- New niche ideas for search terms that could improve conversions.\n"
-   "- A brief explanation of why SEO optimization is critical for this business."
-   )
-
-   # Call the LLM using query_gpt
-   response = query_gpt(prompt)
-   return response
-   
-# Initialize LLM context with business context on app load
-initialize_llm_context()
+from app import run_page, rerun_overhead_caption
+from ga4_data_pull import (
+    describe_top_sources,
+    generate_all_metrics_copy,
+    generate_page_summary,
+    plot_acquisition_pie_chart_plotly,
+)
+from llm_integration import initialize_llm_context, query_gpt
+from perf_tracing import render_debug_panel
+from tenants import get_tenant
+from report_pipeline import get_dashboard_report
+from report_schema import memory_report
+from rollup_cube import preset_ranges, WEIGHTED_METRICS
+
+# Page configuration, applied by run_page on every rerun
+PAGE_CONFIG = {"page_title": "BizBuddy", "layout": "wide", "page_icon": "🤓"}
 
 # Generate and display each summary with LLM analysis
 def display_report_with_llm(summary_func, llm_prompt):
@@ -44,23 +29,77 @@ def display_report_with_llm(summary_func, llm_prompt):
    return llm_response
 
 
-def main():
-    # Fetch data for the last 30 days (from 30 days ago to yesterday)
-    start_date_30_days = "30daysAgo"
-    end_date_yesterday = "yesterday"
-
-    df_30_days = fetch_metrics_by_source(start_date_30_days, end_date_yesterday)
-    
-    # Fetch data for the last month (from 60 days ago to 30 days ago)
-    start_date_60_days = "60daysAgo"
-    end_date_30_days = "31daysAgo"
-
-    df_60_to_30_days = fetch_metrics_by_source(start_date_60_days, end_date_30_days)
-
-    # Fetch event data (generate leads)
-    event_data = fetch_metrics_by_event(start_date_30_days, end_date_yesterday)  # Add this line to fetch event data
-
-    lp_df_30_days = fetch_metrics_by_landing_page(start_date_30_days, end_date_yesterday)
+# An AI insight block, or a note while it is missing (failed blocks are retried on a later load)
+def insight_text(report, name):
+    answer = (report["insights"] or {}).get(name)
+    return answer if answer is not None else "_AI insights are unavailable right now. Check back shortly._"
+
+
+# Date-range explorer backed by the report's rollup cubes, so picking a range never refetches or regroups
+def render_date_range_explorer(report):
+    source_cube = report["source_cube"]
+    if not len(source_cube.dates):
+        st.write("No history available yet.")
+        return
+
+    ranges = preset_ranges()
+    range_name = st.selectbox("Date Range", list(ranges) + ["Custom"], index=1)
+    if range_name == "Custom":
+        # The default has to lie inside the history we have, which may be short or end before yesterday
+        default_start, default_end = ranges["Last 30 Days"][0]
+        default_end = min(max(default_end, source_cube.start_date), source_cube.end_date)
+        default_start = min(max(default_start, source_cube.start_date), default_end)
+        picked = st.date_input(
+            "Pick a range",
+            value=(default_start, default_end),
+            min_value=source_cube.start_date,
+            max_value=source_cube.end_date,
+        )
+        if len(picked) != 2:
+            st.write("Pick an end date to see the totals.")
+            return
+        current = tuple(picked)
+        length = current[1] - current[0] + timedelta(days=1)
+        previous = (current[0] - length, current[0] - timedelta(days=1))
+    else:
+        current, previous = ranges[range_name]
+
+    comparison = source_cube.compare(current, previous)
+    leads = report["event_cube"].totals(*current)["Event Count"].get("generate_lead", 0)
+    previous_leads = report["event_cube"].totals(*previous)["Event Count"].get("generate_lead", 0)
+
+    st.markdown(f"_{current[0]:%b %d, %Y} - {current[1]:%b %d, %Y} compared with {previous[0]:%b %d, %Y} - {previous[1]:%b %d, %Y}_")
+    metric_cols = st.columns(len(comparison) + 1)
+    for col, (metric, row) in zip(metric_cols, comparison.iterrows()):
+        delta = None if pd.isna(row["Change (%)"]) else f"{row['Change (%)']}%"
+        value = f"{row['Current']:,.2f}" if metric in WEIGHTED_METRICS else f"{row['Current']:,.0f}"
+        col.metric(metric, value, delta)
+    lead_delta = f"{(leads - previous_leads) / previous_leads * 100:.1f}%" if previous_leads else None
+    metric_cols[-1].metric("Leads", f"{leads:,.0f}", lead_delta)
+
+    top_sources = source_cube.totals(*current).sort_values(by="Sessions", ascending=False).head(10)
+    st.dataframe(top_sources.round(1), use_container_width=True)
+
+
+# Per-rerun work before rendering, measured by run_page against the overhead budget
+def prepare():
+    # Pick the tenant from the URL (e.g. ?tenant=chelsea), defaulting to the single configured site
+    try:
+        tenant = get_tenant(st.experimental_get_query_params().get("tenant", [None])[0])
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    # Initialize LLM context with the tenant's business context
+    initialize_llm_context(tenant)
+
+    # Read the report materialized by the nightly pre-warm job (built live only if it's missing),
+    # shared across sessions so concurrent viewers don't repeat the fetches and LLM calls
+    return {"report": get_dashboard_report(tenant), "tenant": tenant}
+
+
+def main(report, tenant):
+    st.markdown("<h1 style='text-align: center;'>Welcome to BizBuddy: Let's Grow Your Digital Presence</h1>", unsafe_allow_html=True)
    
     # First column - GA4 Metrics and Insights
     col1, col2 = st.columns(2)
@@ -68,74 +107,77 @@ def main():
     with col1:
         st.markdown("<h3 style='text-align: center;'>Web Performance Overview</h3>", unsafe_allow_html=True)
 
-        # Fetch event data (generate leads)
-        last_month_event_data = fetch_metrics_by_event(start_date_60_days, start_date_30_days)  # Add this line to fetch event data
-        
-        # Summarize monthly data with leads now included (for the 30 days data)
-        current_summary = summarize_monthly_data(df_30_days, event_data)[0]
-        last_month_summary = summarize_last_month_data(df_60_to_30_days, last_month_event_data)[0]
-       
         # Display GA4 metrics (Updated with the new leads data)
-        generate_all_metrics_copy(current_summary, last_month_summary)
-        
-        # LLM insights based on GA data
-        ga_llm_prompt = """
-           Based on the following website performance metrics, provide a short analysis. Highlight key improvements, areas needing attention, 
-           and how these metrics compare to typical industry standards. Limit your response to 2-3 bullet points.
-           """
-        
-        # Combine current summary into a string for LLM processing
-        metric_summary_text = "\n".join([f"{row['Metric']}: {row['Value']}" for _, row in current_summary.iterrows()])
-        ga_insights = query_gpt(ga_llm_prompt, metric_summary_text)
+        generate_all_metrics_copy(report["current_summary"], report["last_month_summary"])
         
         st.markdown("### Insights from AI")
-        st.markdown(ga_insights)
+        st.markdown(insight_text(report, "ga"))
+
+        with st.expander("Unusual Activity & Trends"):
+            st.text(report["trend_summary"])
 
     # Second column - Acquisition Overview (with Pie Chart and Source Descriptions)
     with col2:
         st.markdown("<h3 style='text-align: center;'>Acquisition Overview</h3>", unsafe_allow_html=True)
         acq_col1, acq_col2 = st.columns(2)
     with acq_col1:
-        plot_acquisition_pie_chart_plotly(summarize_monthly_data(df_30_days, event_data)[1])
+        plot_acquisition_pie_chart_plotly(report["acquisition_summary"])
     with acq_col2:
-        describe_top_sources(summarize_monthly_data(df_30_days, event_data)[1])
+        describe_top_sources(report["acquisition_summary"])
         
         temp_url = "https://bizbuddyv1-ppcbuddy.streamlit.app/"
         st.markdown("Search and social ads are key to driving traffic. Check out these tools to help you get going.")
         st.link_button("Paid Search - Helper", temp_url)
         st.link_button("Social Ads - Helper", temp_url)
 
+    # Date range explorer section
+    st.divider()
+    st.markdown("<h3 style='text-align: center;'>Explore Any Date Range</h3>", unsafe_allow_html=True)
+    render_date_range_explorer(report)
+
     # Landing page analysis section
     st.divider()
     col3, col4 = st.columns(2)
     with col3:
         st.markdown("<h3 style='text-align: center;'>Individual Page Overview</h3>", unsafe_allow_html=True)
     
-        # Get landing page summary (now includes leads)
-        landing_page_summary = summarize_landing_pages(lp_df_30_days, event_data)
-        generate_page_summary(landing_page_summary)
-        
-        llm_input = st.session_state.get("page_summary_llm", "")
-        response = query_gpt("Provide insights based on the following page performance data, note that there is no CTAs on any page besides the Home. We need to think of ways to drive more people to the contact page. State only the bullets, no pre text. Limit your response to 2-3 bullet points:", llm_input)
+        # Landing page summary (now includes leads)
+        generate_page_summary(report["landing_page_summary"])
         
         st.markdown("### Insights from AI")
-        st.markdown(response)
+        st.markdown(insight_text(report, "pages"))
     
     with col4:
         st.markdown("<h3 style='text-align: center;'>Search Query Analysis</h3>", unsafe_allow_html=True)
         sq_col1, sq_col2 = st.columns(2)
     with sq_col1:
         st.markdown("These are all the search terms that your website has shown up for in the search results. The Google search engine shows websites based on the relevance of a website's information as it relates to the search terms.")
-        search_data = fetch_search_console_data()
-        st.dataframe(search_data['Search Query'], use_container_width=True)
-        
+        st.dataframe(report["search_data"]['Search Query'], use_container_width=True)
+
+        # Queries for a single page, answered from the indexed query x page x date table
+        search_detail = report["search_detail"]
+        selected_page = st.selectbox("Search queries by page", ["All pages"] + search_detail.pages)
+        page = None if selected_page == "All pages" else selected_page
+        st.dataframe(search_detail.top_k(30, by="Clicks", ascending=False, page=page), use_container_width=True)
+
     with sq_col2:
-        seo_insights = generate_seo_insights(search_data)
+        seo_insights = insight_text(report, "seo")
         st.markdown(seo_insights)
         encoded_message = quote(str(seo_insights))
-        seo_url = f"https://bizbuddyv1-seobuddy.streamlit.app?message={encoded_message}"
+        # The helper picks its tenant from the URL too, for the right Search Console data and audit store
+        seo_url = (
+            f"https://bizbuddyv1-seobuddy.streamlit.app?message={encoded_message}&tenant={quote(tenant.tenant_id)}"
+        )
         st.link_button("Check Out our SEO Helper!!", seo_url)
 
+    # Optional performance debug panel, turned on with ?debug=1 in the URL
+    if st.experimental_get_query_params().get("debug", ["0"])[0] == "1":
+        st.divider()
+        st.caption(rerun_overhead_caption())
+        render_debug_panel()
+        with st.expander("Report Memory"):
+            st.dataframe(memory_report(report), use_container_width=True)
+
 # Execute the main function only when the script is run directly
 if __name__ == "__main__":
-    main()
+    run_page(main, prepare, **PAGE_CONFIG)
@@ -0,0 +1,162 @@
+import threading
+
+import pandas as pd
+
+# Metrics folded into the running per-page totals
+SUM_COLUMNS = ["Sessions", "Total Visitors", "Pageviews"]
+WEIGHTED_COLUMNS = ["Average Session Duration", "Bounce Rate"]  # Averaged by sessions, not by row
+ACCUMULATOR_COLUMNS = SUM_COLUMNS + ["Duration x Sessions", "Bounce x Sessions"]
+
+LEAD_EVENT = "generate_lead"
+LEAD_PAGE = "/contact"
+
+
+def _normalize_dates(dates):
+    return pd.to_datetime(dates, errors="coerce").dt.normalize()
+
+
+# Running per-page landing page totals that new days can be folded into without regrouping history.
+# Each day's partial sums are kept so old days can be subtracted again for a rolling window.
+class LandingPageAccumulator:
+    def __init__(self, lead_event=LEAD_EVENT, lead_page=LEAD_PAGE):
+        self.lead_event = lead_event
+        self.lead_page = lead_page
+        self._lock = threading.Lock()
+        self._totals = pd.DataFrame(columns=ACCUMULATOR_COLUMNS, dtype="float64")
+        self._daily = {}  # date -> per-page partial sums for that day
+        self._totals.index.name = "Page Path"
+        self._leads = pd.Series(dtype="float64")  # page -> leads in the window
+        self._daily_leads = {}  # date -> per-page lead counts for that day
+
+    # Plain per-day partials, enough to rebuild the accumulator in another process (see report_store)
+    def state(self):
+        with self._lock:
+            return {"daily": dict(self._daily), "daily_leads": dict(self._daily_leads)}
+
+    # Replace everything folded so far with a saved state, rebuilding the totals from its partials
+    def load_state(self, state):
+        with self._lock:
+            self._daily = dict(state["daily"])
+            self._daily_leads = dict(state["daily_leads"])
+            totals = pd.DataFrame(columns=ACCUMULATOR_COLUMNS, dtype="float64")
+            for partial in self._daily.values():
+                totals = totals.add(partial, fill_value=0)
+            totals.index.name = "Page Path"
+            self._totals = totals
+            leads = pd.Series(dtype="float64")
+            for day_counts in self._daily_leads.values():
+                leads = leads.add(day_counts, fill_value=0)
+            self._leads = leads
+
+    @property
+    def dates(self):
+        with self._lock:
+            return sorted(self._daily)
+
+    # Either argument may be None; days that were already folded are skipped
+    def fold(self, page_rows, event_rows=None):
+        with self._lock:
+            if page_rows is not None:
+                self._fold_pages(page_rows)
+            if event_rows is not None:
+                self._fold_leads(event_rows)
+
+    def _fold_pages(self, page_rows):
+        if page_rows.empty:
+            return
+        dates = _normalize_dates(page_rows["Date"])
+        new_rows = page_rows.loc[~dates.isin(list(self._daily))]
+        if new_rows.empty:
+            return
+
+        # Coerce only the new rows; history is already numeric
+        numeric = pd.DataFrame({
+            col: pd.to_numeric(new_rows[col], errors="coerce").fillna(0)
+            for col in SUM_COLUMNS + WEIGHTED_COLUMNS
+        })
+        numeric["Duration x Sessions"] = numeric["Average Session Duration"] * numeric["Sessions"]
+        numeric["Bounce x Sessions"] = numeric["Bounce Rate"] * numeric["Sessions"]
+        numeric["Date"] = dates.loc[new_rows.index]
+        numeric["Page Path"] = new_rows["Page Path"].astype(object)  # Compact frames hold paths as categoricals
+
+        for day, day_rows in numeric.groupby("Date"):
+            partial = day_rows.groupby("Page Path")[ACCUMULATOR_COLUMNS].sum()
+            self._daily[day] = partial
+            self._totals = self._totals.add(partial, fill_value=0)
+
+    # Attribution rows carry a Page Path; plain event rows are all credited to the lead page
+    def _fold_leads(self, event_rows):
+        leads = event_rows[event_rows["Event Name"] == self.lead_event]
+        if leads.empty:
+            return
+        counts = pd.to_numeric(leads["Event Count"], errors="coerce").fillna(0)
+        dates = _normalize_dates(leads["Date"])
+        if "Page Path" in leads.columns:
+            pages = leads["Page Path"].astype(object)
+        else:
+            pages = pd.Series(self.lead_page, index=leads.index)
+
+        daily_counts = counts.groupby([dates, pages]).sum()
+        for day, day_counts in daily_counts.groupby(level=0):
+            if day not in self._daily_leads:
+                day_counts = day_counts.droplevel(0)
+                self._daily_leads[day] = day_counts
+                self._leads = self._leads.add(day_counts, fill_value=0)
+
+    def _drop_days(self, should_drop):
+        with self._lock:
+            for day in [d for d in self._daily if should_drop(d)]:
+                self._totals = self._totals.sub(self._daily.pop(day), fill_value=0)
+            for day in [d for d in self._daily_leads if should_drop(d)]:
+                self._leads = self._leads.sub(self._daily_leads.pop(day), fill_value=0)
+
+            # Drop pages that no longer have any traffic left
+            self._totals = self._totals[(self._totals.abs() > 1e-9).any(axis=1)]
+
+    # Subtract every day before the cutoff, keeping the totals for a rolling window
+    def evict_before(self, cutoff):
+        cutoff = pd.Timestamp(cutoff).normalize()
+        self._drop_days(lambda day: day < cutoff)
+
+    # Subtract every day from the given date on, so recent days GA4 is still processing can be folded again
+    def drop_from(self, start):
+        start = pd.Timestamp(start).normalize()
+        self._drop_days(lambda day: day >= start)
+
+    def summary(self):
+        with self._lock:
+            totals = self._totals.copy()
+            leads = self._leads
+
+        # Partials are summed as floats; the counts are whole numbers again for display and the LLM text
+        counts = totals[SUM_COLUMNS].round().astype("int64")
+        sessions = totals["Sessions"]
+        page_summary = pd.DataFrame({
+            "Page Path": totals.index,
+            "Sessions": counts["Sessions"].values,
+            "Total_Visitors": counts["Total Visitors"].values,
+            "Pageviews": counts["Pageviews"].values,
+            "Avg_Session_Duration": (totals["Duration x Sessions"] / sessions).fillna(0).values,
+            "Bounce_Rate": (totals["Bounce x Sessions"] / sessions).fillna(0).values,
+        })
+
+        # Join the sparse per-page lead counts by hash lookup; leads are counted once, not once per daily row
+        page_summary["Conversions"] = page_summary["Page Path"].map(leads).fillna(0).round().astype("int64")
+
+        # Calculate Conversion Rate
+        page_summary["Conversion Rate (%)"] = (page_summary["Conversions"] / page_summary["Sessions"] * 100).round(2)
+
+        # Sort by Sessions in descending order
+        return page_summary.sort_values(by="Sessions", ascending=False).reset_index(drop=True)
+
+
+_accumulators_lock = threading.Lock()
+_accumulators = {}
+
+
+# Process-wide accumulator per tenant, so each new day is only folded in once
+def get_landing_page_accumulator(tenant_id):
+    with _accumulators_lock:
+        if tenant_id not in _accumulators:
+            _accumulators[tenant_id] = LandingPageAccumulator()
+        return _accumulators[tenant_id]
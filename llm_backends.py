@@ -0,0 +1,257 @@
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Interchangeable chat completion backends. Every backend takes (model, messages) and returns a
+# chat.completion dict in the OpenAI response format, so callers don't care which one is active:
+#   openai  - the real API (or any compatible server via base_url, such as the stub server below)
+#   record  - wraps another backend and appends prompt, response, latency and tokens to a JSONL log
+#   replay  - answers from a recorded log without network access
+#   stub    - deterministic local answers with configurable latency and throughput
+# No Streamlit imports here, so the stub server and load tests run outside the app.
+#
+#   python llm_backends.py --port 8011 --latency 0.5 --tokens-per-second 80
+#   BIZBUDDY_LLM_BACKEND=openai BIZBUDDY_LLM_BASE_URL=http://localhost:8011/v1 streamlit run homepage.py
+
+
+def request_key(model, messages):
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def count_tokens(text):
+    # Close enough for load tests: about 3/4 of a word per token
+    return max(1, round(len(text.split()) * 4 / 3))
+
+
+def chat_completion(model, content, prompt_tokens, completion_tokens):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self, api_key=None, base_url=None, client=None):
+        self._client = client
+        self._api_key = api_key
+        self._base_url = base_url
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(api_key=self._api_key, base_url=self._base_url)
+            return self._client
+
+    def complete(self, model, messages):
+        return self.client.chat.completions.create(model=model, messages=messages).model_dump()
+
+
+class RecordingBackend:
+    name = "record"
+
+    def __init__(self, backend, log_path):
+        self.backend = backend
+        self.log_path = log_path
+        self._lock = threading.Lock()
+
+    def complete(self, model, messages):
+        start = time.perf_counter()
+        response = self.backend.complete(model, messages)
+        latency = time.perf_counter() - start
+
+        usage = response.get("usage") or {}
+        entry = {
+            "key": request_key(model, messages),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "backend": self.backend.name,
+            "model": model,
+            "messages": messages,
+            "response": response,
+            "latency": round(latency, 4),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return response
+
+
+# Answers from a recording. Repeated prompts replay their recorded responses in order, then wrap around.
+# With replay_latency the recorded latency is slept too, so timings resemble the recorded run.
+class ReplayBackend:
+    name = "replay"
+
+    def __init__(self, log_path, replay_latency=False):
+        self.replay_latency = replay_latency
+        self._entries = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def complete(self, model, messages):
+        key = request_key(model, messages)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise KeyError(f"No recorded response for this prompt ({key[:12]})")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        entry = entries[position % len(entries)]
+        if self.replay_latency:
+            time.sleep(entry["latency"])
+        return entry["response"]
+
+
+# Deterministic answers derived from a hash of the request. Latency is a fixed time to first token plus
+# completion tokens at tokens_per_second; max_concurrency caps requests served at once, like a rate limit.
+class StubBackend:
+    name = "stub"
+
+    def __init__(self, latency=0.0, tokens_per_second=None, max_concurrency=None, answer_words=60):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_words = answer_words
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    def answer(self, model, messages):
+        digest = request_key(model, messages)
+        words = [f"w{digest[i % 56:i % 56 + 8]}" for i in range(self.answer_words)]
+        bullets = [" ".join(words[i:i + 20]) for i in range(0, len(words), 20)]
+        return f"Stub answer {digest[:8]}:\n" + "\n".join(f"- {bullet}" for bullet in bullets)
+
+    def stream(self, model, messages):
+        content = self.answer(model, messages)
+        if self._slots:
+            self._slots.acquire()
+        try:
+            time.sleep(self.latency)
+            for word in content.split(" "):
+                if self.tokens_per_second:
+                    time.sleep(count_tokens(word) / self.tokens_per_second)
+                yield word + " "
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    def complete(self, model, messages):
+        content = "".join(self.stream(model, messages)).rstrip()
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        return chat_completion(model, content, prompt_tokens, count_tokens(content))
+
+
+# Build a backend from a plain config dict (environment variables or a [llm] secrets section)
+def create_backend(config):
+    mode = config.get("backend", "openai")
+    log_path = config.get("log_path", "llm_log.jsonl")
+    if mode == "stub":
+        return StubBackend(
+            latency=float(config.get("stub_latency", 0.0)),
+            tokens_per_second=float(config["stub_tokens_per_second"]) if config.get("stub_tokens_per_second") else None,
+            max_concurrency=int(config["stub_max_concurrency"]) if config.get("stub_max_concurrency") else None,
+        )
+    if mode == "replay":
+        return ReplayBackend(log_path, replay_latency=str(config.get("replay_latency", "")).lower() in ("1", "true"))
+
+    openai_backend = OpenAIBackend(api_key=config.get("api_key"), base_url=config.get("base_url") or None)
+    if mode == "record":
+        return RecordingBackend(openai_backend, log_path)
+    if mode == "openai":
+        return openai_backend
+    raise ValueError(f"Unknown LLM backend: {mode}")
+
+
+# Minimal OpenAI-compatible server for /v1/chat/completions, answering from any backend (stub by default).
+# Supports "stream": true with server-sent events so streaming clients can be profiled too.
+def make_stub_handler(backend):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model, messages = body.get("model", "stub"), body.get("messages", [])
+
+            if body.get("stream") and hasattr(backend, "stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+                for token in backend.stream(model, messages):
+                    chunk = {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                             "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+                return
+
+            payload = json.dumps(backend.complete(model, messages)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve_stub(backend, host="127.0.0.1", port=8011):
+    server = ThreadingHTTPServer((host, port), make_stub_handler(backend))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local OpenAI-compatible chat completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Completion speed per request.")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Requests served at once.")
+    parser.add_argument("--replay", help="Answer from this recorded JSONL log instead of the stub.")
+    args = parser.parse_args()
+
+    if args.replay:
+        backend = ReplayBackend(args.replay, replay_latency=True)
+    else:
+        backend = StubBackend(args.latency, args.tokens_per_second, args.max_concurrency)
+    server = serve_stub(backend, args.host, args.port)
+    print(f"Serving {backend.name} backend on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
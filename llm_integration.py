@@ -1,10 +1,71 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 import streamlit as st
+from perf_tracing import traced, record_tokens
+from llm_backends import create_backend
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=st.secrets["openai"]["api_key"])
+LLM_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a data analyst with a focus on digital growth and conversion optimization."
 
-# Business context for session memory
+# Backend selection: BIZBUDDY_LLM_* environment variables win over the optional [llm] secrets section,
+# e.g. BIZBUDDY_LLM_BACKEND=stub for offline load tests (see llm_backends for the modes)
+LLM_ENV_SETTINGS = {
+    "backend": "BIZBUDDY_LLM_BACKEND",
+    "log_path": "BIZBUDDY_LLM_LOG",
+    "base_url": "BIZBUDDY_LLM_BASE_URL",
+    "replay_latency": "BIZBUDDY_LLM_REPLAY_LATENCY",
+    "stub_latency": "BIZBUDDY_LLM_STUB_LATENCY",
+    "stub_tokens_per_second": "BIZBUDDY_LLM_STUB_TOKENS_PER_SECOND",
+    "stub_max_concurrency": "BIZBUDDY_LLM_STUB_MAX_CONCURRENCY",
+}
+
+_backend_lock = threading.Lock()
+_backend = None
+_client = None
+
+
+# OpenAI client for the Batch API, created on first use rather than at import
+def get_openai_client():
+    global _client
+    with _backend_lock:
+        if _client is None:
+            _client = OpenAI(api_key=st.secrets["openai"]["api_key"])
+        return _client
+
+
+def llm_settings():
+    try:
+        settings = dict(st.secrets.get("llm", {}))
+    except FileNotFoundError:
+        settings = {}  # No secrets.toml, e.g. offline load tests configured through the environment
+    settings.update({key: os.environ[env] for key, env in LLM_ENV_SETTINGS.items() if env in os.environ})
+    return settings
+
+
+def get_llm_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            settings = llm_settings()
+            if settings.get("backend", "openai") in ("openai", "record"):
+                settings.setdefault("api_key", st.secrets["openai"]["api_key"])
+            _backend = create_backend(settings)
+        return _backend
+
+
+# Send one chat completion through the active backend, recording tokens on the current span
+def complete_chat(messages, model=LLM_MODEL):
+    response = get_llm_backend().complete(model, messages)
+    usage = response.get("usage")
+    if usage:
+        record_tokens(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+    return response
+
+# Business context for session memory, used when a tenant doesn't define its own
 business_context = """
 Answer these questions based on this context: The data is from a one-person dietitian business that began about a year ago. The dietitian has some technical 
 skills and seeks to use GA4 data to grow her website’s performance and make clear, actionable business decisions. Keep insights simple, specific, and free from jargon. 
@@ -12,27 +73,42 @@ Keep a few key things in mind, she is in lynnwood Washing just outside Seattle.
 for her is someone going to the contact page and filling out a contact form (a lead). Keep in mind this data is from this year summarized for that whole time period.
 """
 
-def initialize_llm_context():
-    if "session_summary" not in st.session_state:
-        st.session_state["session_summary"] = business_context
+# Context used when there's no session memory to draw on (shared reports, the pre-warm job)
+def tenant_context(tenant):
+    return (tenant and tenant.business_context) or business_context
+
+def initialize_llm_context(tenant=None):
+    tenant_id = tenant.tenant_id if tenant else None
+    if "session_summary" not in st.session_state or st.session_state.get("llm_tenant_id") != tenant_id:
+        st.session_state["session_summary"] = tenant_context(tenant)
+        st.session_state["llm_tenant_id"] = tenant_id
+
+def build_messages(prompt, data_summary="", context=""):
+    full_prompt = f"{context}\n\nData Summary:\n{data_summary}\n\nUser Question: {prompt}"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": full_prompt}
+    ]
 
-def query_gpt(prompt, data_summary=""):
+# Keep the question and answer in the session memory so follow-up prompts see them
+def remember_exchange(prompt, answer):
+    st.session_state["session_summary"] += f"\nUser: {prompt}\nModel: {answer}\n"
+
+# query_gpt and parse_batch_results report failures as "Error: ..." answers; these must never be stored
+def is_llm_error(answer):
+    return answer is None or answer.startswith("Error:")
+
+# Pass context explicitly when running outside a Streamlit session (e.g. the pre-warm job)
+@traced("llm.query_gpt")
+def query_gpt(prompt, data_summary="", context=None):
     try:
-        session_summary = st.session_state.get("session_summary", "")
-        full_prompt = f"{session_summary}\n\nData Summary:\n{data_summary}\n\nUser Question: {prompt}"
-
-        # Send the prompt to GPT-4 through the OpenAI client instance
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a data analyst with a focus on digital growth and conversion optimization."},
-                {"role": "user", "content": full_prompt}
-            ]
-        )
-        
-        # Access the response using dot notation
-        answer = response.choices[0].message.content
-        st.session_state["session_summary"] += f"\nUser: {prompt}\nModel: {answer}\n"
+        session_summary = context if context is not None else st.session_state.get("session_summary", "")
+
+        # Send the prompt through the configured LLM backend
+        response = complete_chat(build_messages(prompt, data_summary, session_summary))
+        answer = response["choices"][0]["message"]["content"]
+        if context is None:
+            remember_exchange(prompt, answer)
         
         return answer
 
@@ -40,23 +116,142 @@ def query_gpt(prompt, data_summary=""):
         return f"Error: {e}"
 
 
+@traced("llm.query_gpt_keywordbuilder")
 def query_gpt_keywordbuilder(prompt, data_summary=""):
     try:
-        full_prompt = f"\n\nData Summary:\n{data_summary}\n\nUser Question: {prompt}"
-    
-        # Send the prompt to GPT-4 through the OpenAI client instance
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a data analyst with a focus on digital growth and conversion optimization."},
-                {"role": "user", "content": full_prompt}
-            ]
-        )
-        
-        # Access the response using dot notation
-        answer = response.choices[0].message.content
-        
-        return answer
+        # Send the prompt through the configured LLM backend
+        response = complete_chat(build_messages(prompt, data_summary))
+        return response["choices"][0]["message"]["content"]
 
     except Exception as e:
         return f"Error: {e}"
+
+
+# Batch insight generation
+# Jobs use the OpenAI Batch API JSONL format, so a job file can either be submitted to OpenAI with
+# run_openai_batch or worked through locally with run_local_batch at a controlled concurrency.
+
+def make_batch_job(custom_id, prompt, data_summary="", context=""):
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": LLM_MODEL, "messages": build_messages(prompt, data_summary, context)},
+    }
+
+
+def write_batch_file(jobs, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for job in jobs:
+            f.write(json.dumps(job) + "\n")
+    return path
+
+
+def read_batch_file(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _run_batch_job(job):
+    try:
+        body = get_llm_backend().complete(job["body"]["model"], job["body"]["messages"])
+        return {"custom_id": job["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}
+    except Exception as e:
+        return {"custom_id": job["custom_id"], "response": None, "error": {"message": str(e)}}
+
+
+# A batch result counts as answered when the request went through and came back with a 200
+def _batch_succeeded(result):
+    return result.get("error") is None and (result.get("response") or {}).get("status_code") == 200
+
+
+# Throughput for a finished batch, with its tokens recorded on the current span
+def batch_stats(jobs, results, elapsed):
+    succeeded = [r for r in results if _batch_succeeded(r)]
+    tokens_in = sum((r["response"]["body"].get("usage") or {}).get("prompt_tokens", 0) for r in succeeded)
+    tokens_out = sum((r["response"]["body"].get("usage") or {}).get("completion_tokens", 0) for r in succeeded)
+    record_tokens(tokens_in, tokens_out)
+
+    return {
+        "jobs": len(jobs),
+        "succeeded": len(succeeded),
+        "failed": len(jobs) - len(succeeded),
+        "seconds": round(elapsed, 2),
+        "insights_per_minute": round(len(succeeded) / elapsed * 60, 1) if elapsed > 0 else 0.0,
+    }
+
+
+# Work through the jobs with at most max_workers requests in flight, returning results and throughput stats
+@traced("llm.run_batch_jobs")
+def run_batch_jobs(jobs, max_workers=8):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_run_batch_job, jobs))
+    return results, batch_stats(jobs, results, time.perf_counter() - start)
+
+
+# Local stand-in for the Batch API: reads a job file and writes an output file in the same format
+def run_local_batch(input_path, output_path, max_workers=8):
+    results, stats = run_batch_jobs(read_batch_file(input_path), max_workers=max_workers)
+    write_batch_file(results, output_path)
+    return stats
+
+
+def submit_openai_batch(input_path):
+    client = get_openai_client()
+    with open(input_path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+    )
+    return batch.id
+
+
+# Batch states that will never produce an output file
+OPENAI_BATCH_FAILED = ("failed", "expired", "cancelling", "cancelled")
+
+
+# Returns None until OpenAI has finished the batch. Requests that failed inside a completed batch are
+# missing from the output (OpenAI lists them in a separate error file), so they count as failed.
+def fetch_openai_batch_results(batch_id):
+    client = get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status in OPENAI_BATCH_FAILED:
+        raise RuntimeError(f"OpenAI batch {batch_id} is {batch.status}")
+    if batch.status != "completed":
+        return None
+    if not batch.output_file_id:
+        return []
+    content = client.files.content(batch.output_file_id).text
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+# Same contract as run_local_batch, but through the OpenAI Batch API: submit the job file, poll until the
+# batch is done and write its output file. Raises TimeoutError if it takes longer than max_wait_seconds.
+@traced("llm.run_openai_batch")
+def run_openai_batch(input_path, output_path, poll_seconds=60, max_wait_seconds=24 * 60 * 60):
+    start = time.perf_counter()
+    batch_id = submit_openai_batch(input_path)
+    results = fetch_openai_batch_results(batch_id)
+    while results is None:
+        if time.perf_counter() - start > max_wait_seconds:
+            raise TimeoutError(f"OpenAI batch {batch_id} not finished after {max_wait_seconds}s")
+        time.sleep(poll_seconds)
+        results = fetch_openai_batch_results(batch_id)
+
+    write_batch_file(results, output_path)
+    return {**batch_stats(read_batch_file(input_path), results, time.perf_counter() - start), "batch_id": batch_id}
+
+
+# Map custom_id to the answer text, or to an "Error: ..." string like query_gpt returns
+def parse_batch_results(results):
+    answers = {}
+    for result in results:
+        if result.get("error"):
+            answers[result["custom_id"]] = f"Error: {result['error'].get('message')}"
+        elif result["response"]["status_code"] != 200:
+            error = result["response"]["body"].get("error") or {}
+            answers[result["custom_id"]] = f"Error: {error.get('message', result['response']['status_code'])}"
+        else:
+            answers[result["custom_id"]] = result["response"]["body"]["choices"][0]["message"]["content"]
+    return answers
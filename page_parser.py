@@ -0,0 +1,93 @@
+import hashlib
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+# HTML -> SEO fields, with no Streamlit, network or other import-time side effects so it can run anywhere,
+# including crawl worker processes
+
+COPY_TAGS = ["p", "h1", "h2", "h3"]
+HEADING_TAGS = {"h1", "h2", "h3"}
+FIELDS = ["Title", "Meta Description", "Meta Keywords"]
+
+
+def fingerprint(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def page_fingerprints(seo_data):
+    return {
+        **{field: fingerprint(seo_data[field]) for field in FIELDS},
+        "Blocks": [fingerprint(f"{tag}:{text}") for tag, text in seo_data["Blocks"]],
+    }
+
+
+def _extract(soup):
+    # Extract the title tag
+    title = soup.title.string if soup.title and soup.title.string else "No title found"
+
+    # Extract the meta description and keywords
+    description_tag = soup.find("meta", attrs={"name": "description"})
+    meta_description = description_tag["content"] if description_tag and description_tag.get("content") else "No meta description found"
+    keywords_tag = soup.find("meta", attrs={"name": "keywords"})
+    meta_keywords = keywords_tag["content"] if keywords_tag and keywords_tag.get("content") else "No meta keywords found"
+
+    # Main text from <p> and heading tags in document order, kept as blocks so each can be fingerprinted
+    blocks = [(tag.name, tag.get_text(strip=True)) for tag in soup.find_all(COPY_TAGS)]
+    blocks = [(tag, text) for tag, text in blocks if text]
+
+    return {
+        "Title": str(title),
+        "Meta Description": meta_description,
+        "Meta Keywords": meta_keywords,
+        "Headings": [text for tag, text in blocks if tag in HEADING_TAGS],
+        "Blocks": blocks,
+    }
+
+
+def page_copy(blocks):
+    page_text = "\n\n".join(text for _, text in blocks)
+    return page_text if page_text else "No main content found on this page."
+
+
+def extract_page_copy(html):
+    seo_data = _extract(BeautifulSoup(html, 'html.parser'))
+    seo_data["Page Copy"] = page_copy(seo_data["Blocks"])
+    return seo_data
+
+
+# Links on the page that stay on the same host, without fragments
+def internal_links(url, soup):
+    host = urlparse(url).netloc
+    links = set()
+    for a_tag in soup.find_all('a', href=True):
+        full_url = urljoin(url, a_tag['href']).split('#')[0]
+        if urlparse(full_url).netloc == host and full_url.startswith(("http://", "https://")):
+            links.add(full_url)
+    return sorted(links)
+
+
+# Compact record for one crawled page: fields, fingerprints and outgoing links, but no parse tree or raw HTML
+def parse_page(url, html):
+    soup = BeautifulSoup(html, 'html.parser')
+    seo_data = _extract(soup)
+    return {
+        "url": url,
+        **seo_data,
+        "Word Count": sum(len(text.split()) for _, text in seo_data["Blocks"]),
+        "Fingerprints": page_fingerprints(seo_data),
+        "Links": internal_links(url, soup),
+    }
+
+
+# Entry point for the crawl's process pool: one call parses a whole batch so pickling overhead is per batch.
+# A page that fails to parse (e.g. RecursionError on deeply nested HTML) becomes an error record instead
+# of failing the batch.
+def parse_batch(pages):
+    records = []
+    for url, html in pages:
+        try:
+            records.append(parse_page(url, html))
+        except Exception as e:
+            records.append({"url": url, "error": f"{type(e).__name__}: {e}"})
+    return records
@@ -0,0 +1,222 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+# Structured span logs go through the standard logging module so deployments can route them anywhere
+logger = logging.getLogger("bizbuddy.trace")
+
+# Keep the most recent spans for the debug panel and running totals per stage for metrics export
+MAX_RECENT_SPANS = 500
+_lock = threading.Lock()
+_recent_spans = deque(maxlen=MAX_RECENT_SPANS)
+_stage_totals = {}
+_local = threading.local()
+
+SPAN_COUNTERS = ["rows", "bytes", "tokens_in", "tokens_out", "cache_hits", "cache_misses"]
+
+
+def _span_stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    stack = _span_stack()
+    return stack[-1] if stack else None
+
+
+# Open a timed span around a pipeline stage, nested spans are tracked per thread
+@contextmanager
+def trace_span(stage, **labels):
+    span = {
+        "stage": stage,
+        "labels": labels,
+        "started_at": time.time(),
+        "wall_time": 0.0,
+        "error": None,
+    }
+    for counter in SPAN_COUNTERS:
+        span[counter] = 0
+
+    stack = _span_stack()
+    stack.append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span["error"] = type(e).__name__
+        raise
+    finally:
+        span["wall_time"] = time.perf_counter() - start
+        stack.pop()
+        _finish_span(span)
+
+
+def _finish_span(span):
+    span.pop("sized", None)
+    with _lock:
+        _recent_spans.append(span)
+        totals = _stage_totals.setdefault(
+            span["stage"], {"calls": 0, "errors": 0, "wall_time": 0.0, **{c: 0 for c in SPAN_COUNTERS}}
+        )
+        totals["calls"] += 1
+        totals["errors"] += 1 if span["error"] else 0
+        totals["wall_time"] += span["wall_time"]
+        for counter in SPAN_COUNTERS:
+            totals[counter] += span[counter]
+
+    logger.info(json.dumps(span, default=str))
+
+
+# Work out rows and bytes for whatever a traced function returns
+def result_size(result):
+    if isinstance(result, pd.DataFrame):
+        return len(result), int(result.memory_usage(deep=True).sum())
+    if isinstance(result, pd.Series):
+        return len(result), int(result.memory_usage(deep=True))
+    if isinstance(result, str):
+        return 0, len(result.encode("utf-8"))
+    if hasattr(result, "nbytes"):
+        return 0, int(result.nbytes)
+    if hasattr(result, "to_plotly_json"):
+        # Plotly figures: their serialized size, a fair proxy for the traces and layout they hold
+        return 0, len(result.to_json().encode("utf-8"))
+    if isinstance(result, Mapping):
+        return result_size(list(result.values()))
+    if isinstance(result, (tuple, list)):
+        rows, size = 0, 0
+        for item in result:
+            item_rows, item_size = result_size(item)
+            rows += item_rows
+            size += item_size
+        return rows, size
+    return 0, 0
+
+
+def record_result(result, span=None):
+    span = span or current_span()
+    if span is None:
+        return
+    rows, size = result_size(result)
+    span["rows"] += rows
+    span["bytes"] += size
+
+
+# Rows and bytes already measured elsewhere (the shared data layer sizes values once when it stores them),
+# so the traced wrapper doesn't measure the result again
+def record_size(rows, size, span=None):
+    span = span or current_span()
+    if span is None:
+        return
+    span["rows"] += rows
+    span["bytes"] += size
+    span["sized"] = True
+
+
+def record_bytes(num_bytes):
+    span = current_span()
+    if span is not None:
+        span["bytes"] += num_bytes
+
+
+def record_tokens(tokens_in, tokens_out):
+    span = current_span()
+    if span is not None:
+        span["tokens_in"] += tokens_in or 0
+        span["tokens_out"] += tokens_out or 0
+
+
+def record_cache(hit):
+    span = current_span()
+    if span is not None:
+        span["cache_hits" if hit else "cache_misses"] += 1
+
+
+# Decorator for wrapping a whole function in a span and recording the size of what it returns
+def traced(stage):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(stage) as span:
+                result = func(*args, **kwargs)
+                if not (span["rows"] or span["bytes"] or span.get("sized")):
+                    record_result(result, span)
+                return result
+        return wrapper
+    return decorator
+
+
+def recent_spans():
+    with _lock:
+        return list(_recent_spans)
+
+
+def stage_totals():
+    with _lock:
+        return {stage: dict(totals) for stage, totals in _stage_totals.items()}
+
+
+def reset_traces():
+    with _lock:
+        _recent_spans.clear()
+        _stage_totals.clear()
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# Export the per-stage totals in the OpenMetrics text format
+def export_openmetrics():
+    families = [
+        ("bizbuddy_stage_calls", "counter", "Number of times the stage ran.", "calls"),
+        ("bizbuddy_stage_errors", "counter", "Number of times the stage raised.", "errors"),
+        ("bizbuddy_stage_wall_seconds", "counter", "Wall time spent in the stage.", "wall_time"),
+        ("bizbuddy_stage_rows", "counter", "Rows returned by the stage.", "rows"),
+        ("bizbuddy_stage_bytes", "counter", "Bytes returned by the stage.", "bytes"),
+        ("bizbuddy_stage_tokens_in", "counter", "LLM prompt tokens sent by the stage.", "tokens_in"),
+        ("bizbuddy_stage_tokens_out", "counter", "LLM completion tokens received by the stage.", "tokens_out"),
+        ("bizbuddy_stage_cache_hits", "counter", "Cache hits inside the stage.", "cache_hits"),
+        ("bizbuddy_stage_cache_misses", "counter", "Cache misses inside the stage.", "cache_misses"),
+    ]
+    totals = stage_totals()
+
+    lines = []
+    for name, metric_type, help_text, key in families:
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"# HELP {name} {help_text}")
+        for stage in sorted(totals):
+            lines.append(f"{name}_total{{stage=\"{_escape_label(stage)}\"}} {totals[stage][key]}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+# Optional debug panel for the Streamlit app
+def render_debug_panel():
+    import streamlit as st
+
+    with st.expander("Performance Debug Panel"):
+        totals = stage_totals()
+        if not totals:
+            st.write("No traced stages yet.")
+            return
+
+        totals_df = pd.DataFrame.from_dict(totals, orient="index")
+        totals_df.index.name = "Stage"
+        totals_df["avg_wall_time"] = (totals_df["wall_time"] / totals_df["calls"]).round(4)
+        st.markdown("**Stage Totals**")
+        st.dataframe(totals_df.sort_values(by="wall_time", ascending=False), use_container_width=True)
+
+        spans_df = pd.DataFrame(recent_spans()).drop(columns=["labels"])
+        st.markdown("**Recent Spans**")
+        st.dataframe(spans_df.iloc[::-1], use_container_width=True)
+
+        st.download_button("Download OpenMetrics", export_openmetrics(), file_name="bizbuddy_metrics.txt")
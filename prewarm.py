@@ -0,0 +1,125 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from llm_integration import (
+    tenant_context, write_batch_file, run_local_batch, run_openai_batch, read_batch_file, parse_batch_results
+)
+from report_pipeline import build_dashboard_report, build_insight_jobs, apply_batch_insights
+from report_store import REPORT_DIR, save_report, prune_reports
+from shared_data import enable_copy_on_write
+from tenants import load_tenants, get_tenant
+
+# Headless entry point that materializes each tenant's dashboard ahead of time, e.g. from cron:
+#   python prewarm.py                 # every configured tenant
+#   python prewarm.py --tenant chelsea --skip-insights
+#   python prewarm.py --batch --llm-workers 16   # insights for all tenants through one batch job file
+#   python prewarm.py --batch --openai-batch     # the same job file through the OpenAI Batch API
+
+
+def prewarm_tenant(tenant, include_insights=True, keep=7):
+    start = time.perf_counter()
+
+    # No Streamlit session here, so hand the business context to the LLM explicitly
+    report = build_dashboard_report(tenant, context=tenant_context(tenant), include_insights=include_insights)
+    path = save_report(tenant.tenant_id, report)
+    prune_reports(tenant.tenant_id, keep=keep)
+
+    return path, time.perf_counter() - start
+
+
+# Collect every tenant's insight prompts into one job file and work through it at a controlled concurrency,
+# or hand it to the OpenAI Batch API and wait. Reports are saved either way; if the batch fails, the
+# dashboard fills in the missing insights when it first loads them.
+def generate_batch_insights(tenants, reports, llm_workers, keep=7, openai_batch=False, poll_seconds=60):
+    batch_dir = os.path.join(REPORT_DIR, "batches")
+    os.makedirs(batch_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    input_path = os.path.join(batch_dir, f"{stamp}-input.jsonl")
+    output_path = os.path.join(batch_dir, f"{stamp}-output.jsonl")
+
+    jobs = []
+    for tenant in tenants:
+        if tenant.tenant_id in reports:
+            jobs.extend(build_insight_jobs(tenant.tenant_id, reports[tenant.tenant_id], tenant_context(tenant)))
+    write_batch_file(jobs, input_path)
+
+    try:
+        if openai_batch:
+            stats = run_openai_batch(input_path, output_path, poll_seconds=poll_seconds)
+        else:
+            stats = run_local_batch(input_path, output_path, max_workers=llm_workers)
+    except (RuntimeError, TimeoutError) as e:
+        print(f"batch: failed - {e}")
+        stats = {"jobs": len(jobs), "succeeded": 0, "failed": len(jobs)}
+    else:
+        apply_batch_insights(reports, parse_batch_results(read_batch_file(output_path)))
+        print(
+            f"batch: {stats['succeeded']}/{stats['jobs']} insights in {stats['seconds']}s "
+            f"({stats['insights_per_minute']} insights/min), output in {output_path}"
+        )
+
+    for tenant_id, report in reports.items():
+        save_report(tenant_id, report)
+        prune_reports(tenant_id, keep=keep)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-compute BizBuddy dashboard reports.")
+    parser.add_argument("--tenant", action="append", help="Tenant id to pre-warm (repeatable, defaults to all).")
+    parser.add_argument("--skip-insights", action="store_true", help="Only materialize data and summaries.")
+    parser.add_argument("--workers", type=int, default=4, help="Tenants processed at the same time.")
+    parser.add_argument("--keep", type=int, default=7, help="Days of reports to keep per tenant.")
+    parser.add_argument("--batch", action="store_true", help="Generate insights for all tenants as one batch.")
+    parser.add_argument("--llm-workers", type=int, default=8, help="Concurrent LLM requests in batch mode.")
+    parser.add_argument("--openai-batch", action="store_true", help="Run batch mode through the OpenAI Batch API.")
+    parser.add_argument("--poll-seconds", type=int, default=60, help="How often to check on an OpenAI batch.")
+    args = parser.parse_args(argv)
+
+    enable_copy_on_write()
+    tenants = [get_tenant(tenant_id) for tenant_id in args.tenant] if args.tenant else list(load_tenants().values())
+
+    # In batch mode the per-tenant pass only materializes data; insights come from the batch afterwards
+    batch = args.batch and not args.skip_insights
+    include_insights = not (args.skip_insights or batch)
+
+    # Tenant jobs get their own pool; their report fetches go through the shared fair scheduler
+    failures = 0
+    reports = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        if batch:
+            futures = {
+                executor.submit(build_dashboard_report, tenant, tenant_context(tenant), False): tenant
+                for tenant in tenants
+            }
+        else:
+            futures = {
+                executor.submit(prewarm_tenant, tenant, include_insights, args.keep): tenant
+                for tenant in tenants
+            }
+        for future in as_completed(futures):
+            tenant = futures[future]
+            try:
+                if batch:
+                    reports[tenant.tenant_id] = future.result()
+                    print(f"{tenant.tenant_id}: data ready")
+                else:
+                    path, elapsed = future.result()
+                    print(f"{tenant.tenant_id}: wrote {path} in {elapsed:.1f}s")
+            except Exception as e:
+                failures += 1
+                print(f"{tenant.tenant_id}: failed - {e}")
+
+    if batch and reports:
+        stats = generate_batch_insights(
+            tenants, reports, args.llm_workers, args.keep, openai_batch=args.openai_batch, poll_seconds=args.poll_seconds
+        )
+        failures += stats["failed"]
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# Partial top-k selection and plain-text digests shared by the GA4 and Search Console summaries.
+# Selection is an argpartition over one score per row, so picking k rows out of millions is linear
+# and only the k winners are sorted.
+
+
+# Weighted sum of several columns, each min-max scaled to [0, 1] so criteria on different scales
+# combine; a negative weight means lower values are better (e.g. {"Clicks": 1.0, "Avg. Position": -0.5})
+def score(df, weights, normalize=True):
+    total = np.zeros(len(df), dtype=np.float64)
+    if not len(df):
+        return total
+    for column, weight in weights.items():
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+        if normalize:
+            lo, hi = np.nanmin(values), np.nanmax(values)
+            values = (values - lo) / (hi - lo) if hi > lo else np.zeros_like(values)
+        total += weight * np.nan_to_num(values)
+    return total
+
+
+# The k best rows, best first: by one column, or by a weighted score when weights are given
+def top_k(df, k, by=None, ascending=False, weights=None):
+    if weights:
+        values = score(df, weights)
+    else:
+        values = pd.to_numeric(df[by], errors="coerce").to_numpy(dtype=np.float64)
+        if ascending:
+            values = -values
+    values = np.where(np.isnan(values), -np.inf, values)  # Missing values rank last
+
+    if k <= 0:
+        return df.iloc[:0]
+    candidates = np.arange(len(values))
+    if len(values) > k:
+        # Ties at the cut go to the earliest rows, as with a stable sort; argpartition alone picks arbitrarily
+        kth = -np.partition(-values, k - 1)[k - 1]
+        better = np.flatnonzero(values > kth)
+        candidates = np.concatenate([better, np.flatnonzero(values == kth)[:k - len(better)]])
+        candidates.sort()
+    return df.iloc[candidates[np.argsort(-values[candidates], kind="stable")]]
+
+
+# One line per row with the columns joined by `sep`, built column-wise instead of row by row
+def format_digest(rows, columns, sep=" | ", line_end="\n", formats=None):
+    if rows.empty:
+        return ""
+    formats = formats or {}
+    parts = [
+        rows[column].map(formats[column]).astype(str) if column in formats else rows[column].astype(str)
+        for column in columns
+    ]
+    lines = parts[0].str.cat(parts[1:], sep=sep) if len(parts) > 1 else parts[0]
+    return line_end.join(lines) + line_end
@@ -0,0 +1,241 @@
+import hashlib
+from datetime import date, datetime, timedelta
+
+from ga4_data_pull import (
+    fetch_metrics_by_source,
+    fetch_event_attribution,
+    fetch_metrics_by_landing_page,
+    summarize_monthly_data,
+    summarize_last_month_data,
+    build_page_summary_text,
+)
+from gsc_data_pull import fetch_search_console_data, fetch_search_console_detail, SEARCH_DETAIL_DAYS
+from llm_integration import query_gpt, make_batch_job, tenant_context, is_llm_error
+from fair_scheduler import get_scheduler
+from landing_page_aggregator import get_landing_page_accumulator
+from trend_engine import DailyMatrices, rank_trends, format_trends_for_llm
+from rollup_cube import RollupCube
+from perf_tracing import traced
+from report_store import load_report, save_report, load_state, save_state
+from shared_data import get_shared_data_layer
+
+# Fetch data for the last 30 days (from 30 days ago to yesterday)
+START_DATE_30_DAYS = "30daysAgo"
+END_DATE_YESTERDAY = "yesterday"
+
+# Fetch data for the last month (from 60 days ago to 30 days ago)
+START_DATE_60_DAYS = "60daysAgo"
+END_DATE_30_DAYS = "31daysAgo"
+
+# Daily history used for trend detection and the date-range rollups (two years so year-over-year works)
+START_DATE_HISTORY = "730daysAgo"
+
+# Metrics kept in the rollup cubes
+TRAFFIC_METRICS = ["Total Visitors", "New Users", "Sessions", "Pageviews", "Bounce Rate", "Average Session Duration"]
+
+# Landing page window in days, and how many recent days are re-fetched because GA4 may still revise them
+LANDING_PAGE_WINDOW_DAYS = 30
+LANDING_PAGE_SETTLE_DAYS = 2
+LANDING_PAGE_STATE = "landing_pages"  # Name of the saved accumulator state in the report store
+
+# LLM insights based on GA data
+GA_LLM_PROMPT = """
+   Based on the following website performance metrics, provide a short analysis. Highlight key improvements, areas needing attention,
+   and how these metrics compare to typical industry standards. Call out any unusual days or trend shifts listed
+   if they matter for the business. Limit your response to 2-3 bullet points.
+   """
+
+PAGE_LLM_PROMPT = (
+    "Provide insights based on the following page performance data, note that there is no CTAs on any page besides the Home. "
+    "We need to think of ways to drive more people to the contact page. State only the bullets, no pre text. "
+    "Limit your response to 2-3 bullet points:"
+)
+
+
+def build_seo_prompt(search_data):
+    # Prepare the search query list
+    query_list = search_data["Search Query"].unique()
+    formatted_queries = "\n".join(query_list)
+
+    return (
+        "Here are the search queries this website currently appears for:\n"
+        f"{formatted_queries}\n\n"
+        "Based on this data, please provide the following, make sure to bold any suggested keywords:\n"
+        "- Target search terms that align with the website's goals.\n"
+        "- New niche ideas for search terms that could improve conversions.\n"
+        "- A brief explanation of why SEO optimization is critical for this business."
+    )
+
+
+def generate_seo_insights(search_data, context=None):
+    return query_gpt(build_seo_prompt(search_data), context=context)
+
+
+# Run all report fetches concurrently on the shared scheduler, which keeps tenants fair to each other
+@traced("pipeline.fetch_report_data")
+def fetch_report_data(tenant):
+    scheduler = get_scheduler()
+    yesterday = date.today() - timedelta(days=1)
+    search_detail_start = yesterday - timedelta(days=SEARCH_DETAIL_DAYS - 1)
+    fetches = {
+        "df_30_days": (fetch_metrics_by_source, START_DATE_30_DAYS, END_DATE_YESTERDAY),
+        "df_60_to_30_days": (fetch_metrics_by_source, START_DATE_60_DAYS, END_DATE_30_DAYS),
+        "event_data": (fetch_event_attribution, START_DATE_30_DAYS, END_DATE_YESTERDAY),
+        "last_month_event_data": (fetch_event_attribution, START_DATE_60_DAYS, END_DATE_30_DAYS),
+        "search_data": (fetch_search_console_data,),
+        "search_detail": (fetch_search_console_detail, search_detail_start.isoformat(), yesterday.isoformat()),
+        "history_by_source": (fetch_metrics_by_source, START_DATE_HISTORY, END_DATE_YESTERDAY),
+        "history_by_page": (fetch_metrics_by_landing_page, START_DATE_HISTORY, END_DATE_YESTERDAY),
+        "history_events": (fetch_event_attribution, START_DATE_HISTORY, END_DATE_YESTERDAY),
+    }
+    futures = {
+        name: scheduler.submit(tenant.tenant_id, fetch, *args, tenant=tenant)
+        for name, (fetch, *args) in fetches.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+# Fold only the days the tenant's landing page accumulator hasn't seen into its rolling 30-day totals.
+# The per-day partials are saved with the reports, so a fresh pre-warm process fetches only the new days too.
+@traced("pipeline.refresh_landing_page_summary")
+def refresh_landing_page_summary(tenant, event_data):
+    accumulator = get_landing_page_accumulator(tenant.tenant_id)
+    if not accumulator.dates:
+        saved = load_state(tenant.tenant_id, LANDING_PAGE_STATE)
+        if saved is not None:
+            accumulator.load_state(saved)
+    yesterday = date.today() - timedelta(days=1)
+    window_start = date.today() - timedelta(days=LANDING_PAGE_WINDOW_DAYS)
+    settle_start = yesterday - timedelta(days=LANDING_PAGE_SETTLE_DAYS - 1)
+
+    folded = accumulator.dates
+    fetch_start = window_start
+    if folded:
+        fetch_start = max(window_start, min(folded[-1].date() + timedelta(days=1), settle_start))
+        accumulator.drop_from(fetch_start)
+
+    new_rows = fetch_metrics_by_landing_page(fetch_start.isoformat(), yesterday.isoformat(), tenant=tenant)
+    accumulator.fold(new_rows, event_data)
+    accumulator.evict_before(window_start)
+    save_state(tenant.tenant_id, LANDING_PAGE_STATE, accumulator.state())
+    return accumulator.summary()
+
+
+# Everything the dashboard renders, computed without touching Streamlit
+def summarize_report_data(data, tenant):
+    current_summary, acquisition_summary = summarize_monthly_data(data["df_30_days"], data["event_data"])
+    last_month_summary = summarize_last_month_data(data["df_60_to_30_days"], data["last_month_event_data"])[0]
+    landing_page_summary = refresh_landing_page_summary(tenant, data["event_data"])
+    # The source history is pivoted once and shared by trend detection and the rollup cube
+    source_daily = DailyMatrices(data["history_by_source"], "Session Source", TRAFFIC_METRICS)
+    trend_anomalies, trend_shifts = rank_trends([
+        source_daily,
+        (data["history_by_page"], "Page Path"),
+    ])
+
+    return {
+        "current_summary": current_summary,
+        "last_month_summary": last_month_summary,
+        "acquisition_summary": acquisition_summary,
+        "landing_page_summary": landing_page_summary,
+        "page_summary_llm": build_page_summary_text(landing_page_summary),
+        "search_data": data["search_data"],
+        "search_detail": data["search_detail"],
+        "trend_anomalies": trend_anomalies,
+        "trend_shifts": trend_shifts,
+        "trend_summary": format_trends_for_llm(trend_anomalies, trend_shifts),
+        "source_cube": RollupCube(data["history_by_source"], "Session Source", TRAFFIC_METRICS, daily=source_daily),
+        "event_cube": RollupCube(data["history_events"], "Event Name", ["Event Count"]),
+    }
+
+
+def metric_summary_text(current_summary):
+    # Combine current summary into a string for LLM processing
+    return "\n".join([f"{row['Metric']}: {row['Value']}" for _, row in current_summary.iterrows()])
+
+
+# Prompt and data summary for each AI insight block on the dashboard
+def insight_prompts(report):
+    return {
+        "ga": (GA_LLM_PROMPT, metric_summary_text(report["current_summary"]) + "\n\n" + report["trend_summary"]),
+        "pages": (PAGE_LLM_PROMPT, report["page_summary_llm"]),
+        "seo": (build_seo_prompt(report["search_data"]), ""),
+    }
+
+
+# Answers for every insight block. Blocks already answered in `existing` are kept; failed answers are
+# stored as None so a later read retries them instead of serving the error all day.
+def generate_report_insights(report, context=None, existing=None):
+    insights = {}
+    for name, (prompt, data_summary) in insight_prompts(report).items():
+        answer = (existing or {}).get(name)
+        if answer is None:
+            answer = query_gpt(prompt, data_summary, context=context)
+        insights[name] = None if is_llm_error(answer) else answer
+    return insights
+
+
+def insights_complete(report):
+    return report["insights"] is not None and all(answer is not None for answer in report["insights"].values())
+
+
+# Short hash of everything the insights are generated from, so batch results map back to the right data
+def report_data_version(report):
+    digest = hashlib.sha256()
+    for prompt, data_summary in insight_prompts(report).values():
+        digest.update(prompt.encode("utf-8"))
+        digest.update(data_summary.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def build_insight_jobs(tenant_id, report, context=""):
+    data_version = report_data_version(report)
+    return [
+        make_batch_job(f"{tenant_id}|{data_version}|{name}", prompt, data_summary, context)
+        for name, (prompt, data_summary) in insight_prompts(report).items()
+    ]
+
+
+# Write batch answers back onto the reports, keyed by tenant and data version
+def apply_batch_insights(reports, answers):
+    insights_by_key = {}
+    for custom_id, answer in answers.items():
+        tenant_id, data_version, name = custom_id.rsplit("|", 2)
+        insights_by_key.setdefault((tenant_id, data_version), {})[name] = None if is_llm_error(answer) else answer
+
+    for tenant_id, report in reports.items():
+        insights = insights_by_key.get((tenant_id, report["data_version"]))
+        if insights and set(insights) == set(insight_prompts(report)):
+            report["insights"] = insights
+    return reports
+
+
+# Fetch, summarize and (optionally) generate the AI insights for one tenant
+@traced("pipeline.build_dashboard_report")
+def build_dashboard_report(tenant, context=None, include_insights=True):
+    report = summarize_report_data(fetch_report_data(tenant), tenant)
+    report["tenant_id"] = tenant.tenant_id
+    report["built_at"] = datetime.now().isoformat(timespec="seconds")
+    report["data_version"] = report_data_version(report)
+    report["insights"] = generate_report_insights(report, context) if include_insights else None
+    return report
+
+
+def _load_or_build_report(tenant):
+    report = load_report(tenant.tenant_id)
+    if report is None:
+        report = build_dashboard_report(tenant, context=tenant_context(tenant))
+        save_report(tenant.tenant_id, report)
+    elif not insights_complete(report):
+        # Retry blocks that are missing or failed on an earlier attempt
+        report["insights"] = generate_report_insights(report, tenant_context(tenant), existing=report["insights"])
+        save_report(tenant.tenant_id, report)
+    return report
+
+
+# Today's report for a tenant, shared by every session: one disk read (or one live build) however many
+# people open the dashboard at once. Shared reports use the tenant context rather than any session's memory.
+@traced("pipeline.get_dashboard_report")
+def get_dashboard_report(tenant):
+    key = ("dashboard_report", tenant.tenant_id, date.today().isoformat())
+    return get_shared_data_layer().get_or_compute(key, lambda: _load_or_build_report(tenant))
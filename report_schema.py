@@ -0,0 +1,44 @@
+import pandas as pd
+
+# Compact dtypes for report frames: repeated dimensions become categoricals, dates become datetime64,
+# counts int32 and rates float32. Frames are converted once when a report is decoded.
+CATEGORY_COLUMNS = ["Session Source", "Page Path", "Event Name"]
+DATE_COLUMNS = ["Date"]
+COUNT_COLUMNS = ["Total Visitors", "Sessions", "Pageviews", "New Users", "Event Count", "Impressions", "Clicks"]
+RATE_COLUMNS = ["Bounce Rate", "Average Session Duration", "CTR", "Avg. Position"]
+
+
+def compact_frame(df):
+    compact = {}
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORY_COLUMNS:
+            compact[col] = values.astype("category")
+        elif col in DATE_COLUMNS:
+            compact[col] = pd.to_datetime(values, errors="coerce").dt.normalize()
+        elif col in COUNT_COLUMNS:
+            compact[col] = pd.to_numeric(values, errors="coerce").fillna(0).astype("int32")
+        elif col in RATE_COLUMNS:
+            compact[col] = pd.to_numeric(values, errors="coerce").astype("float32")
+        else:
+            compact[col] = values
+    return pd.DataFrame(compact, index=df.index)
+
+
+# Categorical keys need to be plain values before mapping them through a lookup Series
+def lookup(keys, index, fill_value=0):
+    return keys.astype(object).map(index).fillna(fill_value)
+
+
+# Rows and deep memory usage per frame, largest first
+def memory_report(frames):
+    report = pd.DataFrame(
+        [
+            {"Frame": name, "Rows": len(frame), "Bytes": int(frame.memory_usage(deep=True).sum())}
+            for name, frame in frames.items()
+            if isinstance(frame, pd.DataFrame)
+        ],
+        columns=["Frame", "Rows", "Bytes"],
+    )
+    report["Bytes per Row"] = (report["Bytes"] / report["Rows"].where(report["Rows"] > 0)).round(1)
+    return report.sort_values(by="Bytes", ascending=False).reset_index(drop=True)
@@ -0,0 +1,81 @@
+import os
+import pickle
+import tempfile
+from datetime import date
+
+from perf_tracing import traced, record_cache
+
+# Materialized reports live under this directory, one folder per tenant and one file per day
+REPORT_DIR = os.environ.get("BIZBUDDY_REPORT_DIR", "materialized_reports")
+
+
+def report_path(tenant_id, as_of=None):
+    as_of = as_of or date.today()
+    return os.path.join(REPORT_DIR, tenant_id, f"{as_of.isoformat()}.pkl")
+
+
+# Incremental state kept next to the reports (e.g. the landing page accumulator's per-day partials), so a
+# fresh process such as the nightly pre-warm picks up where the last run stopped. Not a .pkl, so
+# prune_reports leaves it alone.
+def state_path(tenant_id, name):
+    return os.path.join(REPORT_DIR, tenant_id, f"{name}.state")
+
+
+# Write atomically so the dashboard never reads a half-written file
+def _write_pickle(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def _read_pickle(path):
+    if not os.path.exists(path):
+        record_cache(False)
+        return None
+
+    record_cache(True)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+@traced("store.save_report")
+def save_report(tenant_id, report, as_of=None):
+    return _write_pickle(report_path(tenant_id, as_of), report)
+
+
+# Returns None when nothing has been materialized for that day yet
+@traced("store.load_report")
+def load_report(tenant_id, as_of=None):
+    return _read_pickle(report_path(tenant_id, as_of))
+
+
+@traced("store.save_state")
+def save_state(tenant_id, name, state):
+    return _write_pickle(state_path(tenant_id, name), state)
+
+
+# Returns None when no state has been saved under that name
+@traced("store.load_state")
+def load_state(tenant_id, name):
+    return _read_pickle(state_path(tenant_id, name))
+
+
+# Drop all but the most recent reports for a tenant
+def prune_reports(tenant_id, keep=7):
+    tenant_dir = os.path.join(REPORT_DIR, tenant_id)
+    if not os.path.isdir(tenant_dir):
+        return []
+
+    reports = sorted(name for name in os.listdir(tenant_dir) if name.endswith(".pkl"))
+    removed = reports[:-keep] if keep else reports
+    for name in removed:
+        os.remove(os.path.join(tenant_dir, name))
+    return removed
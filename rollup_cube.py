@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from trend_engine import DailyMatrices
+
+# Metrics averaged per session rather than summed; the cube stores metric x Sessions and divides back out
+WEIGHTED_METRICS = {"Bounce Rate": "Sessions", "Average Session Duration": "Sessions"}
+
+
+# Cumulative per-day sums per key, built once when data is loaded. Any date-range total is then
+# prefix[end + 1] - prefix[start], so windows and comparisons don't regroup raw rows.
+class RollupCube:
+    # `daily` may be the frame's DailyMatrices when another consumer (e.g. rank_trends) already pivoted it
+    def __init__(self, data, key, metrics, daily=None):
+        self.key = key
+        self.metrics = [m for m in metrics if m in data.columns]
+        if daily is None:
+            daily = DailyMatrices(data, key)
+
+        sum_metrics = [m for m in self.metrics if m not in WEIGHTED_METRICS]
+        weighted_metrics = [m for m in self.metrics if m in WEIGHTED_METRICS]
+        for metric in weighted_metrics:
+            if WEIGHTED_METRICS[metric] not in sum_metrics:
+                sum_metrics.append(WEIGHTED_METRICS[metric])
+
+        self._prefix = {}
+        self.dates = daily.dates
+        self.keys = daily.keys
+        for metric in sum_metrics + weighted_metrics:
+            if metric in weighted_metrics:
+                weight = WEIGHTED_METRICS[metric]
+                matrix = daily.add(f"{metric} x {weight}", (
+                    pd.to_numeric(data[metric], errors="coerce").fillna(0)
+                    * pd.to_numeric(data[weight], errors="coerce").fillna(0)
+                ))
+            else:
+                matrix = daily[metric] if metric in daily else daily.add(metric, data[metric])
+            self._prefix[metric] = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(matrix, axis=0)])
+
+        # Prefix sums of the totals across every key, for O(1) overall figures
+        self._overall = {metric: prefix.sum(axis=1) for metric, prefix in self._prefix.items()}
+
+    @property
+    def nbytes(self):
+        return sum(p.nbytes for p in self._prefix.values()) + sum(o.nbytes for o in self._overall.values())
+
+    @property
+    def start_date(self):
+        return self.dates[0].date()
+
+    @property
+    def end_date(self):
+        return self.dates[-1].date()
+
+    # Row offsets into the prefix arrays for an inclusive date range, clipped to the data we have
+    def _bounds(self, start, end):
+        if not len(self.dates):
+            return 0, 0
+        first = self.dates[0]
+        lo = int(np.clip((pd.Timestamp(start) - first).days, 0, len(self.dates)))
+        hi = int(np.clip((pd.Timestamp(end) - first).days + 1, 0, len(self.dates)))
+        return lo, max(lo, hi)
+
+    def _finish(self, sums, sessions):
+        for metric, weight in WEIGHTED_METRICS.items():
+            if metric in sums:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    sums[metric] = np.where(sessions > 0, sums[metric] / sessions, 0.0)
+        return sums
+
+    # Per-key totals for the range
+    def totals(self, start, end):
+        lo, hi = self._bounds(start, end)
+        sums = {metric: prefix[hi] - prefix[lo] for metric, prefix in self._prefix.items()}
+        sessions = sums.get("Sessions")
+        sums = self._finish(sums, sessions)
+        return pd.DataFrame({metric: sums[metric] for metric in self.metrics}, index=self.keys)
+
+    # Overall totals for the range
+    def overall(self, start, end):
+        lo, hi = self._bounds(start, end)
+        sums = {metric: overall[hi] - overall[lo] for metric, overall in self._overall.items()}
+        sessions = sums.get("Sessions")
+        sums = self._finish(sums, sessions)
+        return pd.Series({metric: float(sums[metric]) for metric in self.metrics})
+
+    # Overall totals for the range next to the comparison range, with the percent change
+    def compare(self, current, previous):
+        current_totals = self.overall(*current)
+        previous_totals = self.overall(*previous)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(previous_totals > 0, (current_totals - previous_totals) / previous_totals * 100, np.nan)
+        return pd.DataFrame({
+            "Current": current_totals,
+            "Previous": previous_totals,
+            "Change (%)": np.round(change, 1),
+        })
+
+
+# Named date ranges ending yesterday, each with the window it is compared against
+def preset_ranges(as_of=None):
+    as_of = as_of or date.today()
+    end = as_of - timedelta(days=1)
+
+    def trailing(days):
+        start = end - timedelta(days=days - 1)
+        return (start, end), (start - timedelta(days=days), start - timedelta(days=1))
+
+    def year_ago(day):
+        try:
+            return day.replace(year=day.year - 1)
+        except ValueError:
+            return day.replace(year=day.year - 1, day=28)  # Feb 29
+
+    # Month to date is compared with the same days of the previous month
+    month_start = end.replace(day=1)
+    prev_month_end = month_start - timedelta(days=1)
+    prev_month_start = prev_month_end.replace(day=1)
+    prev_mtd_end = min(prev_month_start + (end - month_start), prev_month_end)
+
+    last_30 = trailing(30)[0]
+    return {
+        "Last 7 Days": trailing(7),
+        "Last 30 Days": trailing(30),
+        "Last 90 Days": trailing(90),
+        "Month to Date": ((month_start, end), (prev_month_start, prev_mtd_end)),
+        "Last 30 Days vs Last Year": (last_30, (year_ago(last_30[0]), year_ago(last_30[1]))),
+    }
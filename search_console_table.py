@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from ranking import top_k
+
+# Columnar store for Search Console rows at (query, page, date) grain. Queries and pages are interned
+# into dictionaries and stored as int32 codes; rows are deduplicated on their composite key and kept
+# sorted by it, with secondary sort orders by page and by date so slices are binary searches.
+QUERY_COLUMNS = ["Search Query", "Impressions", "Clicks", "CTR", "Avg. Position"]
+
+
+class SearchConsoleTable:
+    def __init__(self, queries, pages, dates, impressions, clicks, positions):
+        query_codes, self.query_dict = pd.factorize(pd.Series(queries, dtype=object), sort=True)
+        page_codes, self.page_dict = pd.factorize(pd.Series(pages, dtype=object), sort=True)
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        self.first_date = dates.min() if len(dates) else np.datetime64("1970-01-01", "D")
+        day_offsets = (dates - self.first_date).astype(np.int64) if len(dates) else np.zeros(0, dtype=np.int64)
+
+        # Composite key (query, page, day) packed into one int64; the last row wins for duplicate keys
+        n_pages = max(len(self.page_dict), 1)
+        self._n_days = int(day_offsets.max()) + 1 if len(day_offsets) else 1
+        keys = (query_codes.astype(np.int64) * n_pages + page_codes) * self._n_days + day_offsets
+        _, reversed_index = np.unique(keys[::-1], return_index=True)
+        keep = len(keys) - 1 - reversed_index  # np.unique keeps the first hit, so search from the end
+
+        self.query_codes = query_codes[keep].astype(np.int32)
+        self.page_codes = page_codes[keep].astype(np.int32)
+        self.day_offsets = day_offsets[keep].astype(np.int32)
+        self.impressions = np.asarray(impressions, dtype=np.int64)[keep].astype(np.int32)
+        self.clicks = np.asarray(clicks, dtype=np.int64)[keep].astype(np.int32)
+        self.positions = np.asarray(positions, dtype=np.float64)[keep].astype(np.float32)
+
+        # Secondary orders for slicing by page or by date
+        self._by_page = np.argsort(self.page_codes, kind="stable")
+        self._by_date = np.argsort(self.day_offsets, kind="stable")
+
+    def __len__(self):
+        return len(self.query_codes)
+
+    @property
+    def nbytes(self):
+        arrays = [self.query_codes, self.page_codes, self.day_offsets, self.impressions,
+                  self.clicks, self.positions, self._by_page, self._by_date]
+        return sum(a.nbytes for a in arrays) + int(self.query_dict.memory_usage(deep=True)) + int(
+            self.page_dict.memory_usage(deep=True)
+        )
+
+    @property
+    def pages(self):
+        return list(self.page_dict)
+
+    # Row indices matching an optional page and an optional inclusive date range
+    def slice(self, page=None, start=None, end=None):
+        rows = None
+        if page is not None:
+            page_code = self.page_dict.get_indexer([page])[0]
+            if page_code < 0:
+                return np.zeros(0, dtype=np.int64)
+            codes = self.page_codes[self._by_page]
+            lo, hi = np.searchsorted(codes, [page_code, page_code + 1])
+            rows = self._by_page[lo:hi]
+
+        if start is not None or end is not None:
+            offsets = self.day_offsets[self._by_date]
+            lo_offset = self._offset(start) if start is not None else 0
+            hi_offset = self._offset(end) + 1 if end is not None else self._n_days
+            lo, hi = np.searchsorted(offsets, [lo_offset, hi_offset])
+            date_rows = self._by_date[lo:hi]
+            rows = date_rows if rows is None else np.intersect1d(rows, date_rows, assume_unique=True)
+
+        return np.arange(len(self)) if rows is None else np.sort(rows)
+
+    def _offset(self, day):
+        return int((np.datetime64(pd.Timestamp(day).date(), "D") - self.first_date).astype(np.int64))
+
+    def to_frame(self, rows=None):
+        rows = np.arange(len(self)) if rows is None else rows
+        impressions = self.impressions[rows]
+        return pd.DataFrame({
+            "Search Query": pd.Categorical.from_codes(self.query_codes[rows], self.query_dict),
+            "Page": pd.Categorical.from_codes(self.page_codes[rows], self.page_dict),
+            "Date": (self.first_date + self.day_offsets[rows]).astype("datetime64[ns]"),
+            "Impressions": impressions,
+            "Clicks": self.clicks[rows],
+            "CTR": np.where(impressions > 0, self.clicks[rows] / np.maximum(impressions, 1), 0).astype(np.float32),
+            "Avg. Position": self.positions[rows],
+        })
+
+    # Query-level totals over the selected rows, with impression-weighted average position
+    def aggregate_by_query(self, rows=None):
+        rows = np.arange(len(self)) if rows is None else rows
+        codes = self.query_codes[rows]
+        n_queries = len(self.query_dict)
+        impressions = np.bincount(codes, weights=self.impressions[rows], minlength=n_queries)
+        clicks = np.bincount(codes, weights=self.clicks[rows], minlength=n_queries)
+        weighted_position = np.bincount(
+            codes, weights=self.positions[rows].astype(np.float64) * self.impressions[rows], minlength=n_queries
+        )
+
+        present = impressions > 0
+        return pd.DataFrame({
+            "Search Query": self.query_dict[present],
+            "Impressions": impressions[present].astype(np.int64),
+            "Clicks": clicks[present].astype(np.int64),
+            "CTR": (clicks[present] / impressions[present]).astype(np.float32),
+            "Avg. Position": (weighted_position[present] / impressions[present]).astype(np.float32),
+        }, columns=QUERY_COLUMNS)
+
+    # The k best queries for the selection without sorting every query
+    def top_k(self, k, by="Avg. Position", ascending=True, weights=None, page=None, start=None, end=None):
+        queries = self.aggregate_by_query(self.slice(page, start, end))
+        return top_k(queries, k, by=by, ascending=ascending, weights=weights).reset_index(drop=True)
@@ -0,0 +1,217 @@
+import argparse
+import os
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from llm_integration import query_gpt, is_llm_error
+from page_parser import FIELDS, extract_page_copy, fingerprint, page_copy, page_fingerprints
+from perf_tracing import traced, record_bytes, record_cache
+
+# One audit record per URL under this directory: the extracted fields, their fingerprints, the HTTP
+# validators and the last LLM analysis. Re-audits only send the LLM what changed since then.
+# Whole sites are re-audited from a crawl (see crawl_pipeline):
+#   python seo_audit.py https://www.example.com/ --tenant chelsea --max-pages 500
+AUDIT_DIR = os.environ.get("BIZBUDDY_AUDIT_DIR", "seo_audits")
+
+AUDIT_INSTRUCTIONS = (
+    "Based on this SEO information, please suggest possible improvements. Have one section main section that talks about "
+    "overall SEO strategy. Below that have another section where you identify actual pieces of text you see that could be tweaked."
+)
+
+
+def audit_path(tenant_id, url):
+    return os.path.join(AUDIT_DIR, tenant_id, f"{fingerprint(url)}.pkl")
+
+
+@traced("seo.load_audit")
+def load_audit(tenant_id, url):
+    path = audit_path(tenant_id, url)
+    if not os.path.exists(path):
+        record_cache(False)
+        return None
+
+    record_cache(True)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# Written atomically, like the materialized reports
+def save_audit(tenant_id, record):
+    path = audit_path(tenant_id, record["url"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+# Conditional GET using the validators from the last audit; returns None when the server says 304
+@traced("seo.fetch_page")
+def fetch_page(url, previous=None):
+    headers = {}
+    if previous and previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous and previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+
+    response = requests.get(url, headers=headers, timeout=20)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()  # Check if request was successful
+    record_bytes(len(response.content))
+    return response
+
+
+# Fields and copy blocks whose fingerprints differ from the last audit, plus how many blocks were removed
+def diff_page(previous_fingerprints, seo_data, fingerprints):
+    changed_fields = [field for field in FIELDS if previous_fingerprints.get(field) != fingerprints[field]]
+    previous_blocks = set(previous_fingerprints.get("Blocks", []))
+    current_blocks = set(fingerprints["Blocks"])
+    changed_blocks = [
+        block for block, block_fingerprint in zip(seo_data["Blocks"], fingerprints["Blocks"])
+        if block_fingerprint not in previous_blocks
+    ]
+    removed = len(previous_blocks - current_blocks)
+    return changed_fields, changed_blocks, removed
+
+
+def build_audit_prompt(seo_data, message="", extra_context=""):
+    return (
+        f"Here is the SEO information and page copy from a webpage:\n\n"
+        f"Title: {seo_data['Title']}\n"
+        f"Meta Description: {seo_data['Meta Description']}\n"
+        f"Meta Keywords: {seo_data['Meta Keywords']}\n"
+        f"Page Copy: {seo_data['Page Copy']}\n"
+        f"{extra_context}\n\n"
+        f"{AUDIT_INSTRUCTIONS}"
+        f"Use the following context to guide your suggestions: {message}. "
+        f"This is an analysis from an initial look at the search query report from this website."
+    )
+
+
+# Only the changed parts of the page go to the LLM, together with the analysis being updated
+def build_reaudit_prompt(seo_data, changed_fields, changed_blocks, removed, previous_analysis, message=""):
+    changes = "".join(f"{field}: {seo_data[field]}\n" for field in changed_fields)
+    changes += "".join(f"New or edited <{tag}> block: {text}\n" for tag, text in changed_blocks)
+    if removed:
+        changes += f"{removed} earlier copy blocks were removed.\n"
+    return (
+        "Here is an earlier SEO analysis of a webpage:\n\n"
+        f"{previous_analysis}\n\n"
+        "Since then, only these parts of the page changed:\n"
+        f"{changes}\n"
+        "Update the analysis for these changes. Keep suggestions about unchanged text as they are, drop ones that no "
+        "longer apply, and keep the same two sections. "
+        f"Use the following context to guide your suggestions: {message}."
+    )
+
+
+# Audit one URL, calling the LLM only when the page changed since its stored analysis.
+# The returned record's "status" is "new", "updated", "unchanged" or "error".
+@traced("seo.audit_page")
+def audit_page(url, tenant_id, message="", extra_context="", context=None, force=False):
+    previous = load_audit(tenant_id, url)
+    try:
+        response = fetch_page(url, None if force else previous)
+    except requests.RequestException as e:
+        return {"url": url, "status": "error", "error": f"An error occurred while fetching the page: {e}"}
+
+    if response is None:
+        return {**previous, "status": "unchanged"}
+
+    validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    return analyze_page(
+        url, tenant_id, extract_page_copy(response.text), previous, validators, message, extra_context, context, force
+    )
+
+
+# Compare extracted page content with the stored audit and ask the LLM only about what changed
+def analyze_page(url, tenant_id, seo_data, previous, validators=None, message="", extra_context="", context=None,
+                 force=False):
+    fingerprints = page_fingerprints(seo_data)
+    record = {
+        "url": url,
+        "seo_data": seo_data,
+        "fingerprints": fingerprints,
+        "etag": (validators or {}).get("etag"),
+        "last_modified": (validators or {}).get("last_modified"),
+        "audited_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    if previous and not force:
+        changed_fields, changed_blocks, removed = diff_page(previous["fingerprints"], seo_data, fingerprints)
+        if not (changed_fields or changed_blocks or removed):
+            record.update(analysis=previous["analysis"], status="unchanged")
+            save_audit(tenant_id, record)
+            return record
+        prompt = build_reaudit_prompt(
+            seo_data, changed_fields, changed_blocks, removed, previous["analysis"], message
+        )
+        status = "updated"
+    else:
+        prompt = build_audit_prompt(seo_data, message, extra_context)
+        status = "new"
+
+    analysis = query_gpt(prompt, context=context)
+    record.update(analysis=analysis, status=status)
+    if is_llm_error(analysis):
+        record["status"] = "error"
+        record["error"] = analysis
+        return record
+    save_audit(tenant_id, record)
+    return record
+
+
+# Audit pages from crawl_pipeline records without fetching them again; unchanged pages cost no LLM call
+def audit_crawl_records(records, tenant_id, message="", max_workers=4, force=False):
+    def audit_record(record):
+        seo_data = {field: record[field] for field in FIELDS + ["Headings", "Blocks"]}
+        seo_data["Page Copy"] = page_copy(seo_data["Blocks"])
+        previous = load_audit(tenant_id, record["url"])
+        return analyze_page(record["url"], tenant_id, seo_data, previous, message=message, context="", force=force)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(audit_record, records))
+
+
+def main():
+    from crawl_pipeline import crawl
+    from llm_integration import tenant_context
+    from tenants import get_tenant
+
+    parser = argparse.ArgumentParser(description="Crawl a site and re-audit the pages that changed.")
+    parser.add_argument("url", nargs="+", help="Start URL(s); links are followed on the same host.")
+    parser.add_argument("--tenant", help="Tenant the audits are stored under (defaults to the default tenant).")
+    parser.add_argument("--max-pages", type=int, default=100, help="Pages to crawl at most.")
+    parser.add_argument("--no-follow", action="store_true", help="Only audit the given URLs.")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent LLM requests.")
+    parser.add_argument("--force", action="store_true", help="Re-analyze every page, changed or not.")
+    parser.add_argument("--message", default="", help="Extra context for the suggestions.")
+    args = parser.parse_args()
+
+    tenant = get_tenant(args.tenant)
+    records, errors, stats = crawl(args.url, max_pages=args.max_pages, follow_links=not args.no_follow)
+    print(f"Crawled {stats['pages']} pages in {stats['seconds']}s, {stats['errors']} errors")
+
+    message = args.message or tenant_context(tenant)
+    audits = audit_crawl_records(records, tenant.tenant_id, message, args.llm_workers, args.force)
+    counts = {}
+    for audit in audits:
+        counts[audit["status"]] = counts.get(audit["status"], 0) + 1
+        if audit["status"] == "error":
+            print(f"{audit['url']}: failed - {audit['error']}")
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -104,88 +104,62 @@
 
 
 import streamlit as st
+from datetime import date, timedelta
 from urllib.parse import unquote
 import gsc_data_pull 
-import requests
-from bs4 import BeautifulSoup
-from llm_integration import query_gpt 
+from app import run_page
+from seo_audit import audit_page
+from tenants import get_tenant
 
-# Page configuration
-st.set_page_config(layout="wide")
+# Page configuration, applied by run_page on every rerun
+PAGE_CONFIG = {"layout": "wide"}
 
-def fetch_page_copy(url):
-    try:
-        # Fetch the content of the page
-        response = requests.get(url)
-        response.raise_for_status()  # Check if request was successful
-
-        # Parse the page content
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract the title tag
-        title = soup.title.string if soup.title else "No title found"
-
-        # Extract the meta description
-        meta_description = ""
-        description_tag = soup.find("meta", attrs={"name": "description"})
-        if description_tag and description_tag.get("content"):
-            meta_description = description_tag["content"]
-        else:
-            meta_description = "No meta description found"
-
-        # Extract meta keywords
-        meta_keywords = ""
-        keywords_tag = soup.find("meta", attrs={"name": "keywords"})
-        if keywords_tag and keywords_tag.get("content"):
-            meta_keywords = keywords_tag["content"]
-        else:
-            meta_keywords = "No meta keywords found"
-
-        # Extract main text from <p> and heading tags
-        paragraphs = soup.find_all(['p', 'h1', 'h2', 'h3'])
-        page_text = "\n\n".join([para.get_text(strip=True) for para in paragraphs])
-
-        # Combine all extracted data into a dictionary
-        seo_data = {
-            "Title": title,
-            "Meta Description": meta_description,
-            "Meta Keywords": meta_keywords,
-            "Page Copy": page_text if page_text else "No main content found on this page."
-        }
-
-        return seo_data
-    except requests.RequestException as e:
-        return {"Error": f"An error occurred while fetching the page: {e}"}
-
-def display_report_with_llm(llm_prompt):
-    # Query the LLM with the prompt
-    llm_response = query_gpt(llm_prompt)
-    st.write("GPT-4 Analysis:")
-    st.write(llm_response)
-
-def main():
+# Per-rerun work before rendering, measured by run_page against the overhead budget
+def prepare():
     # Ensure session_summary is initialized in session state
     if "session_summary" not in st.session_state:
         st.session_state["session_summary"] = ""  # Initialize with an empty string or default value
 
-    
-    # Pull the same dataframe as in the main app
-    df = gsc_data_pull.fetch_search_console_data()  # Replace 'pull_data' with the actual function name
-    
-    # Retrieve message from URL parameter
+    # Retrieve message and tenant from URL parameters
     query_params = st.experimental_get_query_params()
     message = query_params.get("message", ["No message received"])[0]
+    try:
+        tenant = get_tenant(query_params.get("tenant", [None])[0])
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
 
+    # Pull the same dataframe as in the main app
+    yesterday = date.today() - timedelta(days=1)
+    search_detail = gsc_data_pull.fetch_search_console_detail(
+        (yesterday - timedelta(days=gsc_data_pull.SEARCH_DETAIL_DAYS - 1)).isoformat(), yesterday.isoformat(),
+        tenant=tenant
+    )
+    return {"message": message, "tenant": tenant, "search_detail": search_detail}
+
+
+def main(message, tenant, search_detail):
     # Display SEO helper app
     st.title("SEO Helper")
     st.write("This is the SEO helper app.")
 
     # Input field for the URL to scrape
     url = st.text_input("Enter a URL to scrape", placeholder="https://example.com")
+    force = st.checkbox("Re-analyze the whole page even if it hasn't changed")
     
     if url:
         st.write("Fetching content...")
-        seo_data = fetch_page_copy(url)
+
+        # Search queries this page already shows up for, sliced from the query x page x date table
+        page_queries = search_detail.top_k(20, by="Impressions", ascending=False, page=url)
+        extra_context = f"Search Queries this page ranks for: {', '.join(page_queries['Search Query'])}"
+
+        # The audit store only sends the LLM what changed since this page was last analyzed
+        audit = audit_page(url, tenant.tenant_id, message=message, extra_context=extra_context, force=force)
+        if audit["status"] == "error":
+            st.error(audit["error"])
+            return
+        seo_data = audit["seo_data"]
 
         with st.expander("See Website Copy"):
             st.subheader("SEO Information")
@@ -195,20 +169,17 @@ def main():
             st.subheader("Page Copy")
             st.write(seo_data["Page Copy"])
 
-        # Generate the prompt for LLM analysis
-        llm_prompt = (
-            f"Here is the SEO information and page copy from a webpage:\n\n"
-            f"Title: {seo_data['Title']}\n"
-            f"Meta Description: {seo_data['Meta Description']}\n"
-            f"Meta Keywords: {seo_data['Meta Keywords']}\n"
-            f"Page Copy: {seo_data['Page Copy']}\n\n"
-            f"Based on this SEO information, please suggest possible improvements. Have one section main section that talks about overall SEO strategy. Below that have another section where you identify actual pieces of text you see that could be tweaked."
-            f"Use the following context to guide your suggestions: {message}. "
-            f"This is an analysis from an initial look at the search query report from this website."
-        )
+        if not page_queries.empty:
+            with st.expander("See Search Queries for this Page"):
+                st.dataframe(page_queries, use_container_width=True)
 
         # Display LLM analysis
-        display_report_with_llm(llm_prompt)
+        if audit["status"] == "unchanged":
+            st.caption(f"Page unchanged since {audit['audited_at']}, showing the stored analysis.")
+        elif audit["status"] == "updated":
+            st.caption("Only the changed parts of the page were re-analyzed.")
+        st.write("GPT-4 Analysis:")
+        st.write(audit["analysis"])
  
 if __name__ == "__main__":
-     main()
+     run_page(main, prepare, **PAGE_CONFIG)
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import MappingProxyType
+
+import pandas as pd
+from perf_tracing import record_cache, record_size, result_size
+
+# Process-wide cache shared by every Streamlit session. Identical concurrent requests wait on a single
+# in-flight computation, results are frozen and shared, and the least recently used entries are evicted
+# once the cache holds more than max_bytes.
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 900
+
+
+# Process-wide pandas setting, so entry points opt in explicitly (app.bootstrap, prewarm.main) rather than
+# the first cache lookup flipping it. With copy-on-write, shallow copies handed to callers can't write
+# through to the shared frames.
+def enable_copy_on_write():
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return  # Always on from pandas 3, where the option is deprecated
+    try:
+        pd.set_option("mode.copy_on_write", True)
+    except KeyError:
+        pass  # Older pandas without copy-on-write; callers must not mutate shared frames
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, tuple):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Frames are handed out as shallow copies, so a caller renaming or adding columns doesn't touch the shared one
+def _share(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, MappingProxyType):
+        return MappingProxyType({k: _share(v) for k, v in value.items()})
+    if isinstance(value, tuple):
+        return tuple(_share(v) for v in value)
+    return value
+
+
+class SharedDataLayer:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, value, rows, size), least recently used first
+        self._in_flight = {}  # key -> Future for the computation currently running
+        self._bytes = 0
+
+    # Values are sized once when computed; hits record that size on the caller's span instead of measuring
+    # the value again, which for a whole report costs more than the rest of a warm rerun.
+    def get_or_compute(self, key, compute, ttl_seconds=None):
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl_seconds:
+                self._entries.move_to_end(key)
+                record_cache(True)
+                record_size(*entry[2:])
+                return _share(entry[1])
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        # Someone else is already computing this key, wait for their result
+        if not leader:
+            record_cache(True)
+            value, rows, size = future.result()
+            record_size(rows, size)
+            return _share(value)
+
+        record_cache(False)
+        try:
+            value = _freeze(compute())
+            rows, size = result_size(value)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, value, rows, size)
+            del self._in_flight[key]
+        future.set_result((value, rows, size))
+        record_size(rows, size)
+        return _share(value)
+
+    def _store(self, key, value, rows, size):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[3]
+        if size > self.max_bytes:
+            return  # Too big to keep, the waiting callers still get it
+
+        self._entries[key] = (time.monotonic(), value, rows, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[3]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "in_flight": len(self._in_flight)}
+
+
+_layer_lock = threading.Lock()
+_layer = None
+
+
+def get_shared_data_layer():
+    global _layer
+    with _layer_lock:
+        if _layer is None:
+            _layer = SharedDataLayer()
+        return _layer
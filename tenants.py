@@ -0,0 +1,76 @@
+import threading
+from dataclasses import dataclass
+from functools import wraps
+
+import streamlit as st
+from shared_data import get_shared_data_layer
+
+# Search Console property used when secrets only hold the original single-site configuration
+DEFAULT_SITE_URL = 'https://www.chelseawnutrition.com/'
+DEFAULT_TENANT_ID = "default"
+
+
+# One small-business site served by this process
+@dataclass(frozen=True)
+class Tenant:
+    tenant_id: str
+    property_id: str
+    site_url: str
+    business_context: str = ""
+    service_account: str = "google_service_account"  # Secrets section holding this tenant's credentials
+
+
+_tenants_lock = threading.Lock()
+_tenants = None
+
+
+# Read tenants from the [tenants.<id>] secrets sections, falling back to the single-site secrets
+def load_tenants():
+    global _tenants
+    with _tenants_lock:
+        if _tenants is None:
+            tenants = {}
+            for tenant_id, config in st.secrets.get("tenants", {}).items():
+                tenants[tenant_id] = Tenant(
+                    tenant_id=tenant_id,
+                    property_id=str(config["property_id"]),
+                    site_url=config["site_url"],
+                    business_context=config.get("business_context", ""),
+                    service_account=config.get("service_account", "google_service_account"),
+                )
+            if not tenants:
+                tenants[DEFAULT_TENANT_ID] = Tenant(
+                    tenant_id=DEFAULT_TENANT_ID,
+                    property_id=str(st.secrets["google_service_account"]["property_id"]),
+                    site_url=st.secrets["google_service_account"].get("site_url", DEFAULT_SITE_URL),
+                )
+            _tenants = tenants
+        return _tenants
+
+
+def get_tenant(tenant_id=None):
+    tenants = load_tenants()
+    if tenant_id is None:
+        return get_default_tenant()
+    if tenant_id not in tenants:
+        raise ValueError(f"Unknown tenant: {tenant_id}")
+    return tenants[tenant_id]
+
+
+def get_default_tenant():
+    tenants = load_tenants()
+    return tenants.get(DEFAULT_TENANT_ID) or next(iter(tenants.values()))
+
+
+def get_service_account_info(tenant):
+    return dict(st.secrets[tenant.service_account])
+
+
+# Decorator caching a report fetch in the shared data layer, keyed by tenant, function and arguments
+def tenant_cached(func):
+    @wraps(func)
+    def wrapper(*args, tenant=None, **kwargs):
+        tenant = tenant or get_default_tenant()
+        key = (tenant.tenant_id, func.__module__, func.__name__, args, tuple(sorted(kwargs.items())))
+        return get_shared_data_layer().get_or_compute(key, lambda: func(*args, tenant=tenant, **kwargs))
+    return wrapper
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from fair_scheduler import FairScheduler
+
+WAIT_SECONDS = 5
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = FairScheduler(max_workers=6, per_tenant_limit=2)
+    yield scheduler
+    scheduler.shutdown()
+
+
+class BlockingJobs:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.running = {}
+        self.peak = {}
+        self._lock = threading.Lock()
+
+    def job(self, tenant_id):
+        with self._lock:
+            self.running[tenant_id] = self.running.get(tenant_id, 0) + 1
+            self.peak[tenant_id] = max(self.peak.get(tenant_id, 0), self.running[tenant_id])
+        self.started.release()
+        try:
+            assert self.release.wait(WAIT_SECONDS)
+            return tenant_id
+        finally:
+            with self._lock:
+                self.running[tenant_id] -= 1
+
+
+def test_busy_tenant_is_held_to_its_limit_without_blocking_others(scheduler):
+    jobs = BlockingJobs()
+    busy = [scheduler.submit("busy", jobs.job, "busy") for _ in range(6)]
+    for _ in range(2):
+        assert jobs.started.acquire(timeout=WAIT_SECONDS)
+
+    # Four idle workers, but the busy tenant already has its two jobs running
+    assert not jobs.started.acquire(timeout=0.2)
+    assert scheduler.pending() == {"busy": 4}
+
+    # Another tenant gets a free worker straight away
+    other = scheduler.submit("other", jobs.job, "other")
+    assert jobs.started.acquire(timeout=WAIT_SECONDS)
+    assert jobs.running == {"busy": 2, "other": 1}
+
+    jobs.release.set()
+    assert [future.result(WAIT_SECONDS) for future in busy] == ["busy"] * 6
+    assert other.result(WAIT_SECONDS) == "other"
+    assert jobs.peak == {"busy": 2, "other": 1}
+
+
+def test_tenants_are_served_round_robin():
+    scheduler = FairScheduler(max_workers=1, per_tenant_limit=1)
+    started, gate = threading.Event(), threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        gate.wait(WAIT_SECONDS)
+
+    try:
+        # Occupy the only worker so the rest queue up before anything is picked
+        blocker = scheduler.submit("a", block)
+        assert started.wait(WAIT_SECONDS)
+        futures = [scheduler.submit(tenant_id, order.append, f"{tenant_id}{i}")
+                   for i in range(2) for tenant_id in ("a", "a", "b")]
+        gate.set()
+        blocker.result(WAIT_SECONDS)
+        for future in futures:
+            future.result(WAIT_SECONDS)
+    finally:
+        scheduler.shutdown()
+
+    # Tenant "a" queued twice as many jobs, but "b" is not left waiting behind all of them
+    assert order == ["a0", "b0", "a0", "b1", "a1", "a1"]
+
+
+def test_job_errors_reach_the_caller_and_free_the_slot(scheduler):
+    def failing():
+        raise ValueError("bad property id")
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match="property id"):
+            scheduler.submit("tenant-a", failing).result(WAIT_SECONDS)
+    assert scheduler.submit("tenant-a", lambda: "ok").result(WAIT_SECONDS) == "ok"
+
+
+def test_submit_after_shutdown_is_rejected(scheduler):
+    scheduler.shutdown()
+    with pytest.raises(RuntimeError):
+        scheduler.submit("tenant-a", lambda: None)
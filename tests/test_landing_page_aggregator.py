@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from landing_page_aggregator import LandingPageAccumulator
+
+DAYS = pd.date_range("2026-03-01", periods=10)
+PAGES = ["/", "/about", "/contact"]
+
+
+@pytest.fixture
+def page_rows():
+    rng = np.random.default_rng(7)
+    return pd.DataFrame([
+        {"Date": day, "Page Path": page, "Sessions": rng.integers(1, 40), "Total Visitors": rng.integers(1, 30),
+         "Pageviews": rng.integers(1, 90), "Average Session Duration": rng.random() * 120, "Bounce Rate": rng.random()}
+        for day in DAYS for page in PAGES
+    ])
+
+
+@pytest.fixture
+def lead_rows():
+    return pd.DataFrame({
+        "Date": DAYS, "Page Path": "/contact", "Event Name": "generate_lead", "Event Count": range(1, len(DAYS) + 1),
+    })
+
+
+# The summary computed directly from the rows, the way the dashboard used to
+def expected_summary(page_rows, lead_rows):
+    rows = page_rows.assign(
+        duration=page_rows["Average Session Duration"] * page_rows["Sessions"],
+        bounce=page_rows["Bounce Rate"] * page_rows["Sessions"],
+    )
+    grouped = rows.groupby("Page Path")[["Sessions", "Total Visitors", "Pageviews", "duration", "bounce"]].sum()
+    leads = lead_rows.groupby("Page Path")["Event Count"].sum()
+    return pd.DataFrame({
+        "Sessions": grouped["Sessions"],
+        "Total_Visitors": grouped["Total Visitors"],
+        "Pageviews": grouped["Pageviews"],
+        "Avg_Session_Duration": grouped["duration"] / grouped["Sessions"],
+        "Bounce_Rate": grouped["bounce"] / grouped["Sessions"],
+        "Conversions": leads.reindex(grouped.index, fill_value=0),
+    })
+
+
+def assert_matches(summary, expected):
+    summary = summary.set_index("Page Path").sort_index()
+    expected = expected.sort_index()
+    for col in ["Sessions", "Total_Visitors", "Pageviews", "Conversions"]:
+        assert summary[col].dtype == np.int64
+        assert summary[col].tolist() == expected[col].tolist()
+    for col in ["Avg_Session_Duration", "Bounce_Rate"]:
+        np.testing.assert_allclose(summary[col], expected[col])
+
+
+def test_fold_matches_a_full_groupby(page_rows, lead_rows):
+    accumulator = LandingPageAccumulator()
+    accumulator.fold(page_rows, lead_rows)
+    assert_matches(accumulator.summary(), expected_summary(page_rows, lead_rows))
+
+
+def test_folding_day_by_day_skips_days_already_seen(page_rows, lead_rows):
+    accumulator = LandingPageAccumulator()
+    for day in DAYS:
+        accumulator.fold(page_rows[page_rows["Date"] <= day], lead_rows[lead_rows["Date"] <= day])
+    assert accumulator.dates == list(DAYS)
+    assert_matches(accumulator.summary(), expected_summary(page_rows, lead_rows))
+
+
+def test_evict_before_keeps_a_rolling_window(page_rows, lead_rows):
+    accumulator = LandingPageAccumulator()
+    accumulator.fold(page_rows, lead_rows)
+    accumulator.evict_before(DAYS[4])
+
+    assert accumulator.dates == list(DAYS[4:])
+    assert_matches(
+        accumulator.summary(),
+        expected_summary(page_rows[page_rows["Date"] >= DAYS[4]], lead_rows[lead_rows["Date"] >= DAYS[4]]),
+    )
+
+
+def test_drop_from_lets_revised_days_be_folded_again(page_rows, lead_rows):
+    accumulator = LandingPageAccumulator()
+    accumulator.fold(page_rows, lead_rows)
+
+    revised = page_rows.copy()
+    revised.loc[revised["Date"] >= DAYS[8], "Sessions"] += 5
+    accumulator.fold(revised)  # Days already folded are skipped
+    assert_matches(accumulator.summary(), expected_summary(page_rows, lead_rows))
+
+    accumulator.drop_from(DAYS[8])
+    assert accumulator.dates == list(DAYS[:8])
+    accumulator.fold(revised, lead_rows)
+    assert_matches(accumulator.summary(), expected_summary(revised, lead_rows))
+
+
+def test_pages_without_traffic_left_are_dropped(page_rows):
+    accumulator = LandingPageAccumulator()
+    accumulator.fold(page_rows[page_rows["Date"] < DAYS[5]])
+    accumulator.fold(page_rows[(page_rows["Date"] >= DAYS[5]) & (page_rows["Page Path"] == "/")])
+    accumulator.evict_before(DAYS[5])
+    assert accumulator.summary()["Page Path"].tolist() == ["/"]
+
+
+def test_saved_state_rebuilds_the_same_totals(page_rows, lead_rows):
+    accumulator = LandingPageAccumulator()
+    accumulator.fold(page_rows, lead_rows)
+    accumulator.evict_before(DAYS[2])
+
+    restored = LandingPageAccumulator()
+    restored.load_state(accumulator.state())
+    assert restored.dates == accumulator.dates
+    pd.testing.assert_frame_equal(restored.summary(), accumulator.summary())
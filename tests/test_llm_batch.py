@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_integration
+import prewarm
+from llm_backends import StubBackend, chat_completion
+from llm_integration import make_batch_job, parse_batch_results, read_batch_file, write_batch_file
+
+JOBS = [make_batch_job(f"tenant|v1|{name}", f"prompt {name}", "data") for name in ("ga", "pages", "seo")]
+
+
+# Just enough of the OpenAI client for submit and poll: the batch completes after `polls` retrievals
+class FakeBatchClient:
+    def __init__(self, output_lines, polls=2, status="completed"):
+        self.output = "\n".join(json.dumps(line) for line in output_lines)
+        self.remaining = polls
+        self.final_status = status
+        self.submitted = None
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _create_file(self, file, purpose):
+        self.submitted = [json.loads(line) for line in file.read().decode().splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1")
+
+    def _retrieve(self, batch_id):
+        self.remaining -= 1
+        status = self.final_status if self.remaining <= 0 else "in_progress"
+        return SimpleNamespace(status=status, output_file_id="file-out" if status == "completed" else None)
+
+    def _content(self, file_id):
+        return SimpleNamespace(text=self.output)
+
+
+def answered(job, status_code=200):
+    body = chat_completion(job["body"]["model"], f"answer {job['custom_id']}", 10, 5)
+    if status_code != 200:
+        body = {"error": {"message": "rate limited"}}
+    return {"custom_id": job["custom_id"], "response": {"status_code": status_code, "body": body}, "error": None}
+
+
+def test_local_batch_answers_every_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_integration, "_backend", StubBackend())
+    input_path = write_batch_file(JOBS, tmp_path / "input.jsonl")
+
+    stats = llm_integration.run_local_batch(input_path, tmp_path / "output.jsonl", max_workers=2)
+
+    assert (stats["jobs"], stats["succeeded"], stats["failed"]) == (3, 3, 0)
+    answers = parse_batch_results(read_batch_file(tmp_path / "output.jsonl"))
+    assert set(answers) == {job["custom_id"] for job in JOBS}
+    assert all(answer.startswith("Stub answer") for answer in answers.values())
+
+
+def test_openai_batch_is_submitted_and_polled_until_complete(tmp_path, monkeypatch):
+    client = FakeBatchClient([answered(JOBS[0]), answered(JOBS[1], status_code=429)], polls=3)
+    monkeypatch.setattr(llm_integration, "get_openai_client", lambda: client)
+    input_path = write_batch_file(JOBS, tmp_path / "input.jsonl")
+
+    stats = llm_integration.run_openai_batch(input_path, tmp_path / "output.jsonl", poll_seconds=0)
+
+    assert client.submitted == JOBS
+    assert (stats["batch_id"], stats["jobs"], stats["succeeded"], stats["failed"]) == ("batch-1", 3, 1, 2)
+    answers = parse_batch_results(read_batch_file(tmp_path / "output.jsonl"))
+    assert answers == {"tenant|v1|ga": "answer tenant|v1|ga", "tenant|v1|pages": "Error: rate limited"}
+
+
+def test_openai_batch_that_expires_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_integration, "get_openai_client", lambda: FakeBatchClient([], polls=1, status="expired"))
+    input_path = write_batch_file(JOBS, tmp_path / "input.jsonl")
+    with pytest.raises(RuntimeError, match="expired"):
+        llm_integration.run_openai_batch(input_path, tmp_path / "output.jsonl", poll_seconds=0)
+
+
+def test_prewarm_batch_flag_uses_the_openai_batch(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(prewarm, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(prewarm, "load_tenants", lambda: {"t": SimpleNamespace(tenant_id="t", business_context="")})
+    monkeypatch.setattr(prewarm, "build_dashboard_report", lambda tenant, context, include_insights: {"insights": None})
+    monkeypatch.setattr(prewarm, "build_insight_jobs", lambda tenant_id, report, context: JOBS)
+    monkeypatch.setattr(prewarm, "save_report", lambda tenant_id, report: None)
+    monkeypatch.setattr(prewarm, "prune_reports", lambda tenant_id, keep: None)
+
+    def fake_openai_batch(input_path, output_path, poll_seconds):
+        calls.append(poll_seconds)
+        raise TimeoutError("still running")
+
+    monkeypatch.setattr(prewarm, "run_openai_batch", fake_openai_batch)
+
+    assert prewarm.main(["--batch", "--openai-batch", "--poll-seconds", "5"]) == 1
+    assert calls == [5]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from ranking import format_digest, score, top_k
+
+
+def test_top_k_matches_a_stable_full_sort():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Clicks": rng.integers(0, 20, 500), "Avg. Position": rng.integers(1, 30, 500).astype(float)})
+
+    for k in (1, 10, 100, 500, 600):
+        expected = df.sort_values("Clicks", ascending=False, kind="stable").head(k)
+        pd.testing.assert_frame_equal(top_k(df, k, by="Clicks"), expected)
+        expected = df.sort_values("Avg. Position", kind="stable").head(k)
+        pd.testing.assert_frame_equal(top_k(df, k, by="Avg. Position", ascending=True), expected)
+
+
+def test_ties_at_the_cut_keep_the_earliest_rows():
+    df = pd.DataFrame({"Visitors": [5, 9, 5, 5, 9, 1]}, index=list("abcdef"))
+
+    assert list(top_k(df, 3, by="Visitors").index) == ["b", "e", "a"]
+    assert list(top_k(df, 4, by="Visitors").index) == ["b", "e", "a", "c"]
+
+
+def test_missing_values_rank_last():
+    df = pd.DataFrame({"Avg. Position": [np.nan, 3.0, np.nan, 1.0]})
+
+    assert list(top_k(df, 3, by="Avg. Position", ascending=True).index) == [3, 1, 0]
+    assert top_k(df, 0, by="Avg. Position").empty
+
+
+def test_weighted_score_combines_scaled_columns():
+    df = pd.DataFrame({"Clicks": [0, 50, 100], "Avg. Position": [1.0, 10.0, 19.0]})
+
+    np.testing.assert_allclose(score(df, {"Clicks": 1.0, "Avg. Position": -0.5}), [0.0, 0.25, 0.5])
+    assert list(top_k(df, 2, weights={"Clicks": 1.0, "Avg. Position": -2.0}).index) == [0, 1]
+
+
+def test_format_digest_applies_column_formats():
+    rows = pd.DataFrame({"Query": ["diet", "keto"], "CTR": [0.123, 0.5]})
+
+    assert format_digest(rows, ["Query", "CTR"], formats={"CTR": "{:.0%}".format}) == "diet | 12%\nketo | 50%\n"
+    assert format_digest(rows.iloc[:0], ["Query"]) == ""
@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ga4_data_pull
+import report_pipeline
+import report_store
+from landing_page_aggregator import LandingPageAccumulator
+from report_schema import compact_frame
+from search_console_table import SearchConsoleTable
+from tenants import Tenant
+
+TENANT = Tenant(tenant_id="test", property_id="1", site_url="https://example.com/")
+SOURCES = ["google", "(direct)", "facebook"]
+PAGES = ["/", "/about", "/contact"]
+
+
+def days_ago(start, end):
+    return pd.date_range(date.today() - timedelta(days=start), date.today() - timedelta(days=end))
+
+
+def traffic_frame(key, values, days, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [
+        {"Date": day, key: value, "Total Visitors": rng.integers(5, 50), "Sessions": rng.integers(5, 60),
+         "Pageviews": rng.integers(10, 120), "Bounce Rate": rng.random(), "Average Session Duration": rng.random() * 90,
+         "New Users": rng.integers(1, 20)}
+        for day in days for value in values
+    ]
+    return compact_frame(pd.DataFrame(rows))
+
+
+def lead_frame(days):
+    return compact_frame(pd.DataFrame([
+        {"Date": day, "Session Source": "google", "Page Path": "/contact", "Event Name": "generate_lead", "Event Count": 2}
+        for day in days
+    ]))
+
+
+def synthetic_report_data():
+    history = days_ago(90, 1)
+    return {
+        "df_30_days": traffic_frame("Session Source", SOURCES, days_ago(30, 1), seed=1),
+        "df_60_to_30_days": traffic_frame("Session Source", SOURCES, days_ago(60, 31), seed=2),
+        "event_data": lead_frame(days_ago(30, 1)),
+        "last_month_event_data": lead_frame(days_ago(60, 31)),
+        "search_data": pd.DataFrame({"Search Query": ["nutritionist", "meal plan"], "Clicks": [3, 1]}),
+        "search_detail": SearchConsoleTable(["nutritionist"], ["/"], [history[-1]], [10], [3], [2.5]),
+        "history_by_source": traffic_frame("Session Source", SOURCES, history, seed=3),
+        "history_by_page": traffic_frame("Page Path", PAGES, history, seed=4),
+        "history_events": lead_frame(history),
+    }
+
+
+@pytest.fixture
+def report(monkeypatch, tmp_path):
+    data = synthetic_report_data()
+    monkeypatch.setattr(report_store, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(report_pipeline, "get_landing_page_accumulator", lambda tenant_id: LandingPageAccumulator())
+    monkeypatch.setattr(
+        report_pipeline, "fetch_metrics_by_landing_page",
+        lambda start, end, tenant=None: traffic_frame("Page Path", PAGES, pd.date_range(start, end), seed=5),
+    )
+    return report_pipeline.summarize_report_data(data, TENANT)
+
+
+def test_summaries_are_metric_frames(report):
+    for name in ("current_summary", "last_month_summary"):
+        assert isinstance(report[name], pd.DataFrame)
+        assert list(report[name]["Metric"]) == [
+            "Total Visitors", "New Visitors", "Total Sessions", "Total Leads", "Average Session Duration"
+        ]
+    assert report["last_month_summary"].set_index("Metric").loc["Total Leads", "Value"] == 2 * 30
+
+
+def test_metrics_copy_renders_from_a_built_report(report, monkeypatch):
+    rendered = []
+    monkeypatch.setattr(ga4_data_pull.st, "markdown", lambda text, **kwargs: rendered.append(text))
+
+    ga4_data_pull.generate_all_metrics_copy(report["current_summary"], report["last_month_summary"])
+
+    assert len(rendered) == 6  # Heading plus one line per metric
+    assert "Total Visitors" in rendered[1] and "from last month" in rendered[1]
+
+
+def test_landing_page_totals_carry_over_to_a_new_process(monkeypatch, tmp_path):
+    monkeypatch.setattr(report_store, "REPORT_DIR", str(tmp_path))
+    # Every refresh gets an empty accumulator, like a fresh pre-warm process
+    monkeypatch.setattr(report_pipeline, "get_landing_page_accumulator", lambda tenant_id: LandingPageAccumulator())
+    window = traffic_frame("Page Path", PAGES, days_ago(30, 1), seed=5)
+    fetched = []
+
+    def fetch(start, end, tenant=None):
+        fetched.append(start)
+        return window[(window["Date"] >= start) & (window["Date"] <= end)]
+
+    monkeypatch.setattr(report_pipeline, "fetch_metrics_by_landing_page", fetch)
+    events = lead_frame(days_ago(30, 1))
+
+    first = report_pipeline.refresh_landing_page_summary(TENANT, events)
+    second = report_pipeline.refresh_landing_page_summary(TENANT, events)
+
+    settle_start = date.today() - timedelta(days=report_pipeline.LANDING_PAGE_SETTLE_DAYS)
+    assert fetched == [(date.today() - timedelta(days=30)).isoformat(), settle_start.isoformat()]
+    pd.testing.assert_frame_equal(first, second)
@@ -0,0 +1,83 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup_cube import RollupCube, preset_ranges
+
+METRICS = ["Sessions", "Pageviews", "Bounce Rate", "Average Session Duration"]
+
+
+def history(days=60, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [
+        {"Date": day, "Session Source": source, "Sessions": rng.integers(0, 40), "Pageviews": rng.integers(0, 90),
+         "Bounce Rate": rng.random(), "Average Session Duration": rng.random() * 120}
+        for day in pd.date_range("2024-01-01", periods=days) for source in ("google", "(direct)", "bing")
+        if rng.random() > 0.2  # Not every source shows up every day
+    ]
+    return pd.DataFrame(rows)
+
+
+# What the summaries did before the cube: filter the window and regroup, weighting averages by sessions
+def regrouped(data, start, end):
+    window = data[(data["Date"] >= pd.Timestamp(start)) & (data["Date"] <= pd.Timestamp(end))].copy()
+    for metric in ("Bounce Rate", "Average Session Duration"):
+        window[metric] = window[metric] * window["Sessions"]
+    totals = window.groupby("Session Source")[METRICS].sum()
+    for metric in ("Bounce Rate", "Average Session Duration"):
+        totals[metric] = np.where(totals["Sessions"] > 0, totals[metric] / totals["Sessions"], 0.0)
+    return totals
+
+
+@pytest.mark.parametrize("start, end", [("2024-01-01", "2024-02-29"), ("2024-01-10", "2024-01-16"),
+                                        ("2024-02-20", "2024-02-20"), ("2023-12-01", "2024-01-05")])
+def test_totals_match_a_plain_groupby(start, end):
+    data = history()
+    cube = RollupCube(data, "Session Source", METRICS)
+
+    expected = regrouped(data, start, end)
+    totals = cube.totals(start, end).loc[expected.index]
+    pd.testing.assert_frame_equal(totals, expected, check_dtype=False, check_index_type=False)
+
+
+def test_overall_weights_averages_by_sessions():
+    data = history()
+    cube = RollupCube(data, "Session Source", METRICS)
+    window = data[data["Date"].between("2024-01-08", "2024-01-21")]
+
+    overall = cube.overall("2024-01-08", "2024-01-21")
+    assert overall["Sessions"] == window["Sessions"].sum()
+    expected_bounce = (window["Bounce Rate"] * window["Sessions"]).sum() / window["Sessions"].sum()
+    assert overall["Bounce Rate"] == pytest.approx(expected_bounce)
+
+
+def test_ranges_outside_the_data_are_empty():
+    cube = RollupCube(history(), "Session Source", METRICS)
+
+    assert (cube.totals("2025-01-01", "2025-01-31").to_numpy() == 0).all()
+    assert (cube.overall("2024-02-10", "2024-02-01") == 0).all()  # Reversed range
+
+
+def test_compare_reports_percent_change():
+    data = pd.DataFrame({"Date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+                         "Page Path": ["/", "/", "/blog"], "Sessions": [10, 20, 15]})
+    cube = RollupCube(data, "Page Path", ["Sessions", "Pageviews"])
+
+    comparison = cube.compare(("2024-01-02", "2024-01-03"), ("2024-01-01", "2024-01-01"))
+    assert list(comparison.index) == ["Sessions"]  # Metrics missing from the frame are skipped
+    assert comparison.loc["Sessions"].tolist() == [35.0, 10.0, 250.0]
+    assert np.isnan(cube.compare(("2024-01-01", "2024-01-01"), ("2023-12-01", "2023-12-31")).loc["Sessions", "Change (%)"])
+
+
+def test_preset_ranges_compare_like_with_like():
+    ranges = preset_ranges(as_of=date(2024, 3, 31))
+
+    assert ranges["Last 7 Days"] == ((date(2024, 3, 24), date(2024, 3, 30)), (date(2024, 3, 17), date(2024, 3, 23)))
+    # Month to date stops at the end of a shorter previous month
+    assert ranges["Month to Date"] == ((date(2024, 3, 1), date(2024, 3, 30)), (date(2024, 2, 1), date(2024, 2, 29)))
+    # 29 Feb has no counterpart a year earlier
+    current, previous = preset_ranges(as_of=date(2024, 3, 30))["Last 30 Days vs Last Year"]
+    assert current == (date(2024, 2, 29), date(2024, 3, 29))
+    assert previous == (date(2023, 2, 28), date(2023, 3, 29))
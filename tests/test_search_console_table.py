@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from search_console_table import SearchConsoleTable
+
+ROWS = pd.DataFrame({
+    "query": ["diet", "diet", "keto", "keto", "vegan", "diet"],
+    "page": ["/", "/blog", "/", "/blog", "/blog", "/"],
+    "date": pd.to_datetime(["2024-03-01", "2024-03-01", "2024-03-02", "2024-03-03", "2024-03-03", "2024-03-03"]),
+    "impressions": [100, 50, 40, 60, 10, 20],
+    "clicks": [10, 5, 2, 6, 1, 4],
+    "position": [2.0, 8.0, 5.0, 3.0, 9.0, 4.0],
+})
+
+
+def build(rows=ROWS):
+    return SearchConsoleTable(rows["query"], rows["page"], rows["date"], rows["impressions"], rows["clicks"],
+                              rows["position"])
+
+
+def test_duplicate_keys_keep_the_last_row():
+    restated = pd.DataFrame({"query": ["diet"], "page": ["/"], "date": pd.to_datetime(["2024-03-01"]),
+                             "impressions": [120], "clicks": [12], "position": [1.5]})
+    table = build(pd.concat([ROWS, restated], ignore_index=True))
+
+    frame = table.to_frame()
+    assert len(table) == len(ROWS)
+    row = frame[(frame["Search Query"] == "diet") & (frame["Page"] == "/") & (frame["Date"] == "2024-03-01")]
+    assert (row["Impressions"].item(), row["Clicks"].item(), row["Avg. Position"].item()) == (120, 12, 1.5)
+
+
+def test_slices_match_a_boolean_filter():
+    table = build()
+    frame = table.to_frame()
+
+    for page, start, end in [("/blog", None, None), (None, "2024-03-02", "2024-03-03"), ("/", "2024-03-03", None),
+                             (None, None, "2024-03-01"), ("/", None, None)]:
+        mask = np.ones(len(frame), dtype=bool)
+        if page is not None:
+            mask &= frame["Page"] == page
+        if start is not None:
+            mask &= frame["Date"] >= start
+        if end is not None:
+            mask &= frame["Date"] <= end
+        np.testing.assert_array_equal(table.slice(page, start, end), np.flatnonzero(mask))
+
+
+def test_unknown_page_selects_nothing():
+    table = build()
+    assert len(table.slice("/missing")) == 0
+    assert table.top_k(5, page="/missing").empty
+
+
+def test_aggregate_weights_position_by_impressions():
+    queries = build().aggregate_by_query().set_index("Search Query")
+
+    assert list(queries.index) == ["diet", "keto", "vegan"]
+    assert queries.loc["diet", "Impressions"] == 170 and queries.loc["diet", "Clicks"] == 19
+    assert queries.loc["diet", "Avg. Position"] == np.float32((100 * 2.0 + 50 * 8.0 + 20 * 4.0) / 170)
+    assert queries.loc["keto", "CTR"] == np.float32(8 / 100)
+
+
+def test_top_k_ranks_the_selected_rows():
+    table = build()
+
+    assert list(table.top_k(2)["Search Query"]) == ["keto", "diet"]
+    assert list(table.top_k(1, by="Clicks", ascending=False, page="/blog")["Search Query"]) == ["keto"]
+    assert list(table.top_k(5, start="2024-03-03")["Search Query"]) == ["keto", "diet", "vegan"]
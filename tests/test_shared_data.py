@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import perf_tracing
+import shared_data
+from perf_tracing import traced
+from shared_data import SharedDataLayer, enable_copy_on_write
+
+WAIT_SECONDS = 5
+
+
+def test_concurrent_callers_share_one_computation():
+    layer = SharedDataLayer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(WAIT_SECONDS)
+        return "report"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(layer.get_or_compute, "tenant-a", compute) for _ in range(8)]
+        assert started.wait(WAIT_SECONDS)
+        release.set()
+        results = [future.result(WAIT_SECONDS) for future in futures]
+
+    assert calls == [1]
+    assert results == ["report"] * 8
+    assert layer.stats() == {"entries": 1, "bytes": len("report"), "in_flight": 0}
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    layer = SharedDataLayer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        started.set()
+        release.wait(WAIT_SECONDS)
+        raise RuntimeError("GA4 quota exceeded")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(layer.get_or_compute, "tenant-a", failing) for _ in range(4)]
+        assert started.wait(WAIT_SECONDS)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="quota"):
+                future.result(WAIT_SECONDS)
+
+    assert calls == [1]
+    assert layer.stats() == {"entries": 0, "bytes": 0, "in_flight": 0}
+
+    # The next request computes again instead of replaying the failure
+    assert layer.get_or_compute("tenant-a", lambda: "recovered") == "recovered"
+
+
+def test_least_recently_used_entries_are_evicted_over_the_byte_budget():
+    layer = SharedDataLayer(max_bytes=10)
+    layer.get_or_compute("a", lambda: "aaaa")
+    layer.get_or_compute("b", lambda: "bbbb")
+    layer.get_or_compute("a", lambda: "unused")  # Hit: "a" becomes most recently used
+    layer.get_or_compute("c", lambda: "cccc")
+
+    assert layer.stats()["bytes"] == 8
+    assert layer.get_or_compute("a", lambda: "recomputed") == "aaaa"
+    assert layer.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+
+def test_oversized_results_are_returned_but_not_kept():
+    layer = SharedDataLayer(max_bytes=4)
+    assert layer.get_or_compute("big", lambda: "too large") == "too large"
+    assert layer.stats()["entries"] == 0
+
+
+def test_callers_cannot_change_the_shared_frame():
+    enable_copy_on_write()
+    layer = SharedDataLayer()
+    compute = lambda: {"data": pd.DataFrame({"Sessions": [1, 2]})}
+
+    first = layer.get_or_compute("frames", compute)
+    first["data"]["Sessions"] = 0
+    first["data"]["Extra"] = 1
+
+    second = layer.get_or_compute("frames", compute)
+    assert second["data"]["Sessions"].tolist() == [1, 2]
+    assert list(second["data"].columns) == ["Sessions"]
+    with pytest.raises(TypeError):
+        second["data"] = None
+
+
+def test_values_are_sized_once_and_hits_report_the_stored_size(monkeypatch):
+    sized = []
+    original = perf_tracing.result_size
+    monkeypatch.setattr(perf_tracing, "result_size", lambda value: sized.append(value) or original(value))
+    monkeypatch.setattr(shared_data, "result_size", perf_tracing.result_size)
+
+    layer = SharedDataLayer()
+    fetch = traced("test.shared_data.sized_once")(lambda: layer.get_or_compute("report", lambda: "report"))
+    for _ in range(3):
+        assert fetch() == "report"
+
+    assert sized == ["report"]
+    totals = perf_tracing.stage_totals()["test.shared_data.sized_once"]
+    assert (totals["calls"], totals["bytes"], totals["cache_hits"]) == (3, 3 * len("report"), 2)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trend_engine import (
+    DailyMatrices,
+    Z_SCORE_THRESHOLD,
+    anomalies_from_matrices,
+    family_threshold,
+    rank_trends,
+    shifts_from_matrices,
+)
+
+DATES = pd.date_range(end="2026-10-18", periods=120)
+
+
+def daily_frame(counts, key="Page Path"):
+    day_idx, key_idx = np.nonzero(counts > 0)
+    return pd.DataFrame({
+        "Date": DATES[day_idx],
+        key: pd.Categorical.from_codes(key_idx, [f"/p{i}" for i in range(counts.shape[1])]),
+        "Sessions": counts[day_idx, key_idx],
+    })
+
+
+def poisson_counts(volumes, seed=0):
+    return np.random.default_rng(seed).poisson(volumes, (len(DATES), len(volumes)))
+
+
+def test_daily_matrices_match_a_pivot_table():
+    data = pd.DataFrame({
+        "Date": pd.to_datetime(["2026-01-01", "2026-01-01", "2026-01-03", "2026-01-03", None]),
+        "Session Source": pd.Categorical(["google", "bing", "google", "google", "bing"],
+                                         categories=["bing", "google", "unused"]),
+        "Sessions": [5, 2, 1, 3, 9],
+    })
+    daily = DailyMatrices(data, "Session Source", ["Sessions"])
+
+    expected = data.dropna().pivot_table(index="Date", columns="Session Source", values="Sessions", aggfunc="sum",
+                                         observed=True).reindex(pd.date_range("2026-01-01", "2026-01-03"), fill_value=0)
+    assert list(daily.keys) == ["bing", "google"]
+    assert list(daily.dates) == list(expected.index)
+    np.testing.assert_array_equal(daily["Sessions"], expected.fillna(0).to_numpy())
+
+
+def test_noise_across_thousands_of_pages_flags_nothing():
+    volumes = np.exp(np.random.default_rng(1).normal(0.5, 1.5, 3000))
+    daily = DailyMatrices(daily_frame(poisson_counts(volumes)), "Page Path", ["Sessions"])
+    assert anomalies_from_matrices(daily, "Sessions").empty
+
+
+def test_spike_on_a_busy_page_is_flagged_but_a_blip_on_a_quiet_one_is_not():
+    counts = poisson_counts(np.r_[np.full(50, 40.0), np.full(50, 0.3)], seed=2)
+    counts[-2, 3] = 160  # Busy page: four times its usual day
+    counts[-3, 70] = 4  # Quiet page: a few extra visits
+    daily = DailyMatrices(daily_frame(counts), "Page Path", ["Sessions"])
+
+    anomalies = anomalies_from_matrices(daily, "Sessions")
+    assert anomalies[["Key", "Date", "Value"]].values.tolist() == [["/p3", DATES[-2], 160]]
+    assert anomalies.loc[0, "Z-Score"] > family_threshold(7 * 50)
+
+
+def test_threshold_grows_with_the_number_of_tests():
+    assert family_threshold(0) == Z_SCORE_THRESHOLD
+    assert family_threshold(1) == Z_SCORE_THRESHOLD
+    assert Z_SCORE_THRESHOLD < family_threshold(1_000) < family_threshold(100_000)
+    assert family_threshold(42_000) == pytest.approx(4.9, abs=0.05)
+
+
+def test_level_shift_is_found_at_the_right_week():
+    counts = poisson_counts(np.full(5, 20.0), seed=3)
+    counts[70:, 2] += 30
+    daily = DailyMatrices(daily_frame(counts), "Page Path", ["Sessions"])
+
+    shifts = shifts_from_matrices(daily, "Sessions", top_n=1)
+    assert shifts.loc[0, "Key"] == "/p2"
+    assert abs((shifts.loc[0, "Changed On"] - DATES[70]).days) < 7
+    assert shifts.loc[0, "Mean After"] - shifts.loc[0, "Mean Before"] == pytest.approx(30, abs=5)
+
+
+def test_rank_trends_accepts_frames_and_shared_matrices():
+    counts = poisson_counts(np.full(5, 20.0), seed=4)
+    counts[-1, 0] = 120
+    data = daily_frame(counts).assign(**{"Total Visitors": lambda df: df["Sessions"]})
+    shared = DailyMatrices(data, "Page Path", ["Sessions", "Total Visitors"])
+
+    from_frame = rank_trends([(data, "Page Path")])
+    from_shared = rank_trends([shared])
+    for left, right in zip(from_frame, from_shared):
+        pd.testing.assert_frame_equal(left, right)
+    assert set(from_frame[0]["Key"]) == {"/p0"}
+    assert rank_trends([(data, "Session Source")])[0].empty  # Frames without the key are skipped